@@ -1,14 +1,32 @@
+import argparse
+import bisect
+import itertools
+import json
 import math
+import multiprocessing
 import random
+import sys
+import time
 import tkinter as tk
+from collections import OrderedDict
 from tkinter import *
 
+import numpy as np
+
 # Problem parameters
 num_items = 100
 frac_target = 0.7
 min_value = 128
 max_value = 2048
 
+# Weighted 0/1 knapsack parameters
+min_weight = 1
+max_weight = 100
+frac_capacity = 0.5  # Capacity as a share of the total item weight
+dp_cell_limit = 10 ** 7  # Largest num_items * (capacity + 1) solved by dynamic programming
+bnb_item_limit = 10 ** 6  # Largest instance handed to branch and bound when DP is too big
+bnb_node_limit = 10 ** 7  # Nodes explored by branch and bound before it returns its best so far
+
 # UI parameters
 screen_padding = 25
 item_padding = 5
@@ -19,60 +37,170 @@ num_generations = 1000
 pop_size = 50
 elitism_count = 2
 mutation_rate = 0.05  # Adjusted mutation rate
+ga_engine = 'list'  # 'list' for GeneticAlgorithm, 'numpy' for VectorizedGeneticAlgorithm
+row_block = 512  # Genomes per block when the numpy engine converts the population for BLAS
+diversity_factor = 0.1  # Genomes closer than this fraction of num_items share their fitness
+sharing_sample_size = None  # Compare each genome with this many random neighbours instead of all of them
+pair_block = 1 << 18  # Packed words XORed at once by the numpy fitness sharing
+selection_method = 'sus'  # 'sus' or 'tournament'
+tournament_size = 3  # Genomes competing in each tournament
+fitness_cache_size = 4096  # Genomes whose fitness is memoized (least recently used are evicted), 0 to disable
+
+# Island model parameters
+num_islands = 4  # Independent populations, one process each
+island_engine = 'numpy'  # Engine used inside every island
+migration_interval = 10  # Generations between migrations
+migration_count = 2  # Best genomes sent from each island per migration
+migration_topology = 'ring'  # 'ring' or 'random'
 
 sleep_time = 100  # in milliseconds
+generations_per_frame = 1  # GA generations run between two rendered frames
+
+# Pack a boolean genome into a Python int bitset, bit i holding gene i
+bit_chars = bytes.maketrans(b'\x00\x01', b'01')
+def pack_genome(genome):
+    bits = getattr(genome, 'bits', None)
+    if bits is not None:
+        return bits
+    return int(bytes(genome)[::-1].translate(bit_chars) or b'0', 2)
+
+# Positions of the set bits of a packed genome, lowest first
+def set_bit_positions(bits):
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+# A list of genes that carries its packed bits and the cached sum of its selected item values
+class Genome(list):
+    def __init__(self, genes, total, bits=None):
+        super().__init__(genes)
+        self.total = total
+        self.bits = pack_genome(genes) if bits is None else bits
+
+# Number of set bits in every uint64 word of an array
+popcount_table = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+def popcount_words(words):
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(words)
+    return popcount_table[words.view(np.uint8)].reshape(words.shape + (8,)).sum(axis=-1)
+
+# All items of an instance stored as parallel arrays instead of one object per item
+class ItemStore:
+    def __init__(self, values, colors, weights=None):
+        self.values = values  # int64 item values
+        self.colors = colors  # uint32 0xRRGGBB colors
+        self.weights = weights  # int64 item weights, only for weighted instances
+        self.rects = np.zeros((len(values), 4), dtype=np.float32)  # x, y, w, h on the canvas
+        self.rect_ids = np.zeros(len(values), dtype=np.int32)
+        self.text_ids = np.zeros(len(values), dtype=np.int32)
+
+    def __len__(self):
+        return len(self.values)
+
+    def __getitem__(self, index):
+        return Item(self, index)
 
-# Helper function to generate a random RGB color
-def random_rgb_color():
-    red = random.randint(0x10, 0xff)
-    green = random.randint(0x10, 0xff)
-    blue = random.randint(0x10, 0xff)
-    hex_color = '#{:02x}{:02x}{:02x}'.format(red, green, blue)
-    return hex_color
+    def __iter__(self):
+        return (Item(self, index) for index in range(len(self.values)))
 
-# Class to represent an item with value and color
+    def color(self, index):
+        return '#{:06x}'.format(int(self.colors[index]))
+
+# View of one item in an ItemStore, used for drawing
 class Item:
-    def __init__(self):
-        self.value = random.randint(min_value, max_value)
-        self.color = random_rgb_color()
-        self.x = 0
-        self.y = 0
-        self.w = 0
-        self.h = 0
+    def __init__(self, store, index):
+        self.store = store
+        self.index = index
+
+    @property
+    def value(self):
+        return int(self.store.values[self.index])
+
+    @property
+    def weight(self):
+        return int(self.store.weights[self.index])
+
+    @property
+    def color(self):
+        return self.store.color(self.index)
 
     def place(self, x, y, w, h):
-        self.x = x
-        self.y = y
-        self.w = w
-        self.h = h
+        self.store.rects[self.index] = (x, y, w, h)
 
     def draw(self, canvas, active=False):
         gap = 14
-        # Draw the rectangle representing the item
-        if active:
-            canvas.create_rectangle(self.x,
-                                    self.y,
-                                    self.x + self.w,
-                                    self.y + self.h,
-                                    fill=self.color,
-                                    outline=self.color,
-                                    width=stroke_width)
-        else:
-            canvas.create_rectangle(self.x,
-                                    self.y,
-                                    self.x + self.w,
-                                    self.y + self.h,
-                                    fill='',
-                                    outline=self.color,
-                                    width=stroke_width)
+        x, y, w, h = (float(v) for v in self.store.rects[self.index])
+        color = self.color
+        # Draw the rectangle representing the item, keeping its canvas id for later updates
+        self.store.rect_ids[self.index] = canvas.create_rectangle(x,
+                                                                  y,
+                                                                  x + w,
+                                                                  y + h,
+                                                                  fill=color if active else '',
+                                                                  outline=color,
+                                                                  width=stroke_width)
 
         # Draw the value text with more spacing
-        canvas.create_text(self.x + self.w + gap, self.y + self.h / 2, text=f'{self.value}', anchor='w', font=('Arial', 12), fill='black')
+        self.store.text_ids[self.index] = canvas.create_text(x + w + gap, y + h / 2, text=f'{self.value}', anchor='w', font=('Arial', 12), fill='black')
+
+    # Fill or empty the already drawn rectangle
+    def set_active(self, canvas, active):
+        canvas.itemconfig(int(self.store.rect_ids[self.index]), fill=self.color if active else '')
+
+# Bounded least-recently-used memo of fitness values keyed by packed genome
+class FitnessCache:
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, key):
+        fitness = self.entries.get(key)
+        if fitness is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.entries.move_to_end(key)
+        return fitness
+
+    def store(self, key, fitness):
+        self.entries[key] = fitness
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+# Generate count items with distinct values, sampled without replacement from [min_value, max_value];
+# the range is widened upwards when it holds fewer than count values
+def generate_items(count):
+    rng = np.random.default_rng(random.getrandbits(64))
+    span = max(max_value - min_value + 1, count)
+    values = rng.choice(span, size=count, replace=False).astype(np.int64) + min_value
+    channels = rng.integers(0x10, 0x100, size=(count, 3), dtype=np.uint32)
+    colors = channels[:, 0] << 16 | channels[:, 1] << 8 | channels[:, 2]
+    return ItemStore(values, colors)
+
+# Target sum of a random frac_target share of the items, sampled without replacement
+def choose_target(items_list):
+    rng = np.random.default_rng(random.getrandbits(64))
+    target_set = rng.choice(len(items_list), size=int(len(items_list) * frac_target), replace=False)
+    return int(items_list.values[target_set].sum())
+
+# Fitness of a selection summing to total_value: penalize exceeding the target, otherwise reward being close to it
+def target_fitness(total_value, target):
+    if total_value > target:
+        return -abs(total_value - target) * 2
+    return 1 / (1 + abs(target - total_value))
 
 # Genetic Algorithm Class
 class GeneticAlgorithm:
     def __init__(self, items_list, target, pop_size, num_generations, mutation_rate, elitism_count):
         self.items_list = items_list
+        self.values = items_list.values.tolist()
         self.target = target
         self.pop_size = pop_size
         self.num_generations = num_generations
@@ -81,69 +209,126 @@ class GeneticAlgorithm:
         self.population = []
         self.generation = 0
         self.best_genome = None
+        self.best_sum = 0
+        self.fitness_cache = FitnessCache(fitness_cache_size) if fitness_cache_size > 0 else None
 
-    # Calculate the sum of the values of items included in the genome
+    # Calculate the sum of the values of items included in the genome, reusing the cached sum when it has one
     def gene_sum(self, genome):
-        return sum(item.value for idx, item in enumerate(self.items_list) if genome[idx])
+        total = getattr(genome, 'total', None)
+        if total is not None:
+            return total
+        return sum(value for value, gene in zip(self.values, genome) if gene)
 
-    # Fitness function with penalty for exceeding target value
+    # Fitness of a genome, looked up in the fitness cache before it is evaluated
     def fitness(self, genome):
-        total_value = self.gene_sum(genome)
-        # Penalize if exceeding target, otherwise reward being close to target
-        if total_value > self.target:
-            return -abs(total_value - self.target) * 2
-        return 1 / (1 + abs(self.target - total_value))
+        if self.fitness_cache is None:
+            return self.evaluate_fitness(genome)
+        key = (len(genome), pack_genome(genome))
+        fitness = self.fitness_cache.lookup(key)
+        if fitness is None:
+            fitness = self.evaluate_fitness(genome)
+            self.fitness_cache.store(key, fitness)
+        return fitness
+
+    # Fitness function with penalty for exceeding target value
+    def evaluate_fitness(self, genome):
+        return self.fitness_from_sum(self.gene_sum(genome))
+
+    def fitness_from_sum(self, total_value):
+        return target_fitness(total_value, self.target)
 
     # Generate the initial population randomly
     def generate_initial_population(self):
-        self.population = [[random.random() < frac_target for _ in range(len(self.items_list))] for _ in range(self.pop_size)]
+        self.population = []
+        for _ in range(self.pop_size):
+            genes = [random.random() < frac_target for _ in range(len(self.items_list))]
+            self.population.append(Genome(genes, sum(value for value, gene in zip(self.values, genes) if gene)))
+
+    # Select count parent indices for a whole generation at once
+    def select_parents(self, fitnesses, count):
+        if selection_method == 'tournament':
+            contestants = min(tournament_size, len(fitnesses))
+            return [max(random.sample(range(len(fitnesses)), contestants), key=fitnesses.__getitem__) for _ in range(count)]
+        return self.sus_select_parents(fitnesses, count)
 
-    # Select parents using Stochastic Universal Sampling (SUS)
-    def sus_select_parents(self, population, fitnesses):
-        total_fitness = sum(fitnesses)
-        point_distance = total_fitness / 2  # Two parents are selected
-        start_point = random.uniform(0, point_distance)
+    # Select parents using Stochastic Universal Sampling (SUS): count evenly spaced pointers, one pass over the population
+    def sus_select_parents(self, fitnesses, count):
+        if count <= 0:
+            return []
+        # Shift negative fitnesses (over-target genomes) so every weight is non-negative
+        lowest = min(fitnesses)
+        weights = [fitness - lowest for fitness in fitnesses] if lowest < 0 else fitnesses
+        total_fitness = sum(weights)
+        if total_fitness <= 0:
+            return [random.randrange(len(fitnesses)) for _ in range(count)]
 
+        point_distance = total_fitness / count
+        point = random.uniform(0, point_distance)
         parents = []
         current_sum = 0
-        for genome, fitness in zip(population, fitnesses):
-            current_sum += fitness
-            if len(parents) < 2 and current_sum >= start_point:
-                parents.append(genome)
-                start_point += point_distance
-        return parents[0], parents[1]
-
-    # Two-point crossover to generate new offspring
+        for index, weight in enumerate(weights):
+            current_sum += weight
+            while len(parents) < count and point < current_sum:
+                parents.append(index)
+                point += point_distance
+        parents.extend([len(weights) - 1] * (count - len(parents)))  # Floating point shortfall on the last pointer
+        random.shuffle(parents)  # Pair parents randomly instead of by rank
+        return parents
+
+    # Two-point crossover to generate new offspring, adjusting the cached sum only where the parents differ
     def crossover(self, parent1, parent2):
         length = len(parent1)
         point1 = random.randint(0, length // 2)
         point2 = random.randint(point1 + 1, length - 1)
 
+        bits1, bits2 = pack_genome(parent1), pack_genome(parent2)
+        segment = ((1 << point2) - 1) ^ ((1 << point1) - 1)
+        total = self.gene_sum(parent1)
+        for i in set_bit_positions((bits1 ^ bits2) & segment):
+            total += self.values[i] if parent2[i] else -self.values[i]
+
         child = parent1[:point1] + parent2[point1:point2] + parent1[point2:]
-        return child
+        return Genome(child, total, (bits1 & ~segment) | (bits2 & segment))
 
-    # Multi-point mutation for better diversity
+    # Multi-point mutation for better diversity; flip positions are drawn with geometric skips so only flipped genes are visited
     def mutate(self, genome):
-        for i in range(len(genome)):
-            if random.random() < self.mutation_rate:
-                genome[i] = not genome[i]
+        if self.mutation_rate <= 0:
+            return genome
+        if not isinstance(genome, Genome):
+            genome = Genome(genome, self.gene_sum(genome))
+        log_keep = math.log(1 - self.mutation_rate) if self.mutation_rate < 1 else -math.inf
+        i = int(math.log(1 - random.random()) / log_keep)
+        while i < len(genome):
+            genome[i] = not genome[i]
+            genome.total += self.values[i] if genome[i] else -self.values[i]
+            genome.bits ^= 1 << i
+            i += 1 + int(math.log(1 - random.random()) / log_keep)
         return genome
 
-    # Maintain diversity by using fitness sharing
+    # Maintain diversity by using fitness sharing, with Hamming distances taken by XOR + popcount of packed genomes
     def fitness_sharing(self, population, fitnesses):
-        diversity_factor = 0.1
-        shared_fitnesses = []
-        for i in range(len(population)):
-            shared_fitness = fitnesses[i]
-            for j in range(len(population)):
-                if i != j and self.hamming_distance(population[i], population[j]) < len(population[i]) * diversity_factor:
-                    shared_fitness *= 0.9  # Reduce fitness if similar to others
-            shared_fitnesses.append(shared_fitness)
-        return shared_fitnesses
-
-    # Calculate Hamming distance between two genomes
-    def hamming_distance(self, genome1, genome2):
-        return sum(g1 != g2 for g1, g2 in zip(genome1, genome2))
+        if not population:
+            return []
+        packed = [pack_genome(genome) for genome in population]
+        threshold = len(population[0]) * diversity_factor
+        size = len(packed)
+        niche_counts = [0] * size
+        if sharing_sample_size is None or sharing_sample_size >= size - 1:
+            for i in range(size):
+                bits_i = packed[i]
+                for j in range(i + 1, size):
+                    if (bits_i ^ packed[j]).bit_count() < threshold:
+                        niche_counts[i] += 1
+                        niche_counts[j] += 1
+        else:
+            # Estimate each niche count from a random sample of neighbours
+            scale = (size - 1) / sharing_sample_size
+            for i in range(size):
+                bits_i = packed[i]
+                neighbours = random.sample(range(size - 1), sharing_sample_size)
+                close = sum((bits_i ^ packed[j + (j >= i)]).bit_count() < threshold for j in neighbours)
+                niche_counts[i] = close * scale
+        return [fitness * 0.9 ** count for fitness, count in zip(fitnesses, niche_counts)]  # Reduce fitness if similar to others
 
     # Evolve the population to the next generation
     def evolve_population(self):
@@ -152,14 +337,182 @@ class GeneticAlgorithm:
         sorted_population = sorted(zip(self.population, shared_fitnesses), key=lambda x: x[1], reverse=True)
         new_population = [genome for genome, _ in sorted_population[:self.elitism_count]]
 
-        while len(new_population) < self.pop_size:
-            parent1, parent2 = self.sus_select_parents([p for p, _ in sorted_population], [f for _, f in sorted_population])
-            child = self.crossover(parent1, parent2)
+        num_children = max(0, self.pop_size - len(new_population))
+        parents = self.select_parents([f for _, f in sorted_population], 2 * num_children)
+        for i in range(num_children):
+            child = self.crossover(sorted_population[parents[2 * i]][0], sorted_population[parents[2 * i + 1]][0])
             child = self.mutate(child)
             new_population.append(child)
 
         self.population = new_population
         self.best_genome = sorted_population[0][0]
+        self.best_sum = self.gene_sum(self.best_genome)
+
+    # Best genomes of the current population, sent to another island when migrating
+    def emigrants(self, count):
+        return sorted(self.population, key=self.fitness, reverse=True)[:count]
+
+    # Replace the worst genomes with migrants from another island
+    def immigrate(self, genomes):
+        genomes = genomes[:len(self.population)]
+        if genomes:
+            self.population.sort(key=self.fitness, reverse=True)
+            self.population[len(self.population) - len(genomes):] = [Genome(genome, genome.total, genome.bits) for genome in genomes]
+
+    def run_step(self):
+        if self.generation == 0:
+            self.generate_initial_population()
+
+        self.evolve_population()
+        self.generation += 1
+
+        return self.best_genome, self.generation
+
+# Genetic Algorithm with the whole population stored as one 2-D boolean array
+class VectorizedGeneticAlgorithm:
+    def __init__(self, items_list, target, pop_size, num_generations, mutation_rate, elitism_count):
+        self.items_list = items_list
+        self.values = items_list.values.astype(np.float64)
+        self.target = target
+        self.pop_size = pop_size
+        self.num_generations = num_generations
+        self.mutation_rate = mutation_rate
+        self.elitism_count = elitism_count
+        self.population = np.zeros((0, len(items_list)), dtype=bool)
+        self.generation = 0
+        self.best_genome = None
+        self.best_sum = 0
+        self.rng = np.random.default_rng(random.getrandbits(64))
+
+    # Sum of the selected item values for every genome, one matrix-vector product per block of rows
+    def gene_sums(self, population, vector=None):
+        vector = self.values if vector is None else vector
+        sums = np.empty(len(population), dtype=np.int64)
+        for start in range(0, len(population), row_block):
+            block = population[start:start + row_block].astype(np.float64)
+            sums[start:start + row_block] = np.rint(block @ vector)
+        return sums
+
+    def gene_sum(self, genome):
+        return int(self.gene_sums(genome[np.newaxis, :])[0])
+
+    # Same penalty/reward shape as GeneticAlgorithm.fitness, applied to a vector of sums
+    def fitness_from_sums(self, sums):
+        diff = np.abs(sums - self.target).astype(np.float64)
+        return np.where(sums > self.target, -diff * 2, 1 / (1 + diff))
+
+    def fitness_from_sum(self, total_value):
+        return float(self.fitness_from_sums(np.array([total_value]))[0])
+
+    def fitness(self, genome):
+        return self.fitness_from_sum(self.gene_sum(genome))
+
+    def population_fitness(self, population, sums):
+        return self.fitness_from_sums(sums)
+
+    def generate_initial_population(self):
+        self.population = self.rng.random((self.pop_size, len(self.items_list))) < frac_target
+
+    # Pack every genome into rows of uint64 words
+    def pack_population(self, population):
+        packed = np.packbits(population, axis=1)
+        padding = -packed.shape[1] % 8
+        if padding:
+            packed = np.pad(packed, ((0, 0), (0, padding)))
+        return np.ascontiguousarray(packed).view(np.uint64)
+
+    # Fitness sharing with Hamming distances taken by XOR + popcount over packed words, a block of rows at a time
+    def fitness_sharing(self, population, fitnesses):
+        words = self.pack_population(population)
+        threshold = population.shape[1] * diversity_factor
+        size, num_words = words.shape
+        if sharing_sample_size is None or sharing_sample_size >= size - 1:
+            niche_counts = np.empty(size)
+            rows = max(1, pair_block // max(1, size * num_words))
+            for start in range(0, size, rows):
+                block = words[start:start + rows]
+                distances = popcount_words(block[:, np.newaxis, :] ^ words[np.newaxis, :, :]).sum(axis=2, dtype=np.int64)
+                niche_counts[start:start + rows] = (distances < threshold).sum(axis=1) - 1  # Every genome is close to itself
+        else:
+            # Estimate each niche count from a random sample of neighbours
+            neighbours = (np.arange(size)[:, np.newaxis] + self.rng.integers(1, size, (size, sharing_sample_size))) % size
+            close = np.empty(size)
+            rows = max(1, pair_block // max(1, sharing_sample_size * num_words))
+            for start in range(0, size, rows):
+                block = words[start:start + rows]
+                distances = popcount_words(block[:, np.newaxis, :] ^ words[neighbours[start:start + rows]]).sum(axis=2, dtype=np.int64)
+                close[start:start + rows] = (distances < threshold).sum(axis=1)
+            niche_counts = close * (size - 1) / sharing_sample_size
+        return fitnesses * 0.9 ** niche_counts
+
+    # Select a pair of parents for every child, all in one pass
+    def select_parents(self, fitnesses, num_pairs):
+        if selection_method == 'tournament':
+            contestants = self.rng.integers(0, len(fitnesses), (2 * num_pairs, min(tournament_size, len(fitnesses))))
+            winners = contestants[np.arange(len(contestants)), np.argmax(fitnesses[contestants], axis=1)]
+        else:
+            winners = self.sus_select_parents(fitnesses, 2 * num_pairs)
+        return winners.reshape(num_pairs, 2)
+
+    # Stochastic Universal Sampling with count evenly spaced pointers over the cumulative fitness
+    def sus_select_parents(self, fitnesses, count):
+        if count <= 0:
+            return np.empty(0, dtype=np.intp)
+        # Shift negative fitnesses (over-target genomes) so every weight is non-negative
+        weights = fitnesses - min(fitnesses.min(), 0)
+        cumulative = np.cumsum(weights)
+        if cumulative[-1] <= 0:
+            return self.rng.integers(0, len(fitnesses), count)
+
+        point_distance = cumulative[-1] / count
+        points = point_distance * (self.rng.random() + np.arange(count))
+        indices = np.minimum(np.searchsorted(cumulative, points, side='right'), len(fitnesses) - 1)
+        return self.rng.permutation(indices)  # Pair parents randomly instead of by rank
+
+    # Two-point crossover for all children at once, as a mask over the gene positions
+    def crossover(self, parents1, parents2):
+        length = parents1.shape[1]
+        point1 = self.rng.integers(0, length // 2 + 1, len(parents1))
+        point2 = self.rng.integers(point1 + 1, length)
+        positions = np.arange(length)
+        mask = (positions >= point1[:, np.newaxis]) & (positions < point2[:, np.newaxis])
+        return np.where(mask, parents2, parents1)
+
+    # Flip about mutation_rate of the bits of every child without drawing one random number per bit
+    def mutate(self, genomes):
+        num_flips = self.rng.binomial(genomes.shape[1], self.mutation_rate, len(genomes))
+        rows = np.repeat(np.arange(len(genomes)), num_flips)
+        cols = self.rng.integers(0, genomes.shape[1], len(rows))
+        genomes[rows, cols] = ~genomes[rows, cols]
+        return genomes
+
+    def evolve_population(self):
+        sums = self.gene_sums(self.population)
+        fitnesses = self.population_fitness(self.population, sums)
+        shared_fitnesses = self.fitness_sharing(self.population, fitnesses)
+        order = np.argsort(-shared_fitnesses, kind='stable')
+        sorted_population = self.population[order]
+
+        num_children = max(0, self.pop_size - self.elitism_count)
+        parents = self.select_parents(shared_fitnesses[order], num_children)
+        children = self.crossover(sorted_population[parents[:, 0]], sorted_population[parents[:, 1]])
+        children = self.mutate(children)
+
+        self.population = np.concatenate([sorted_population[:min(self.elitism_count, self.pop_size)], children])
+        self.best_genome = sorted_population[0]
+        self.best_sum = int(sums[order[0]])
+
+    # Best genomes of the current population, sent to another island when migrating
+    def emigrants(self, count):
+        order = np.argsort(-self.population_fitness(self.population, self.gene_sums(self.population)), kind='stable')
+        return list(self.population[order[:count]])
+
+    # Replace the worst genomes with migrants from another island
+    def immigrate(self, genomes):
+        genomes = genomes[:len(self.population)]
+        if genomes:
+            order = np.argsort(-self.population_fitness(self.population, self.gene_sums(self.population)), kind='stable')
+            self.population[order[len(order) - len(genomes):]] = np.array(genomes, dtype=bool)
 
     def run_step(self):
         if self.generation == 0:
@@ -170,6 +523,229 @@ class GeneticAlgorithm:
 
         return self.best_genome, self.generation
 
+# Genetic Algorithm for the weighted 0/1 knapsack: maximize value with total weight under capacity
+class WeightedGeneticAlgorithm(VectorizedGeneticAlgorithm):
+    def __init__(self, items_list, capacity, pop_size, num_generations, mutation_rate, elitism_count):
+        super().__init__(items_list, capacity, pop_size, num_generations, mutation_rate, elitism_count)
+        self.capacity = capacity
+        self.weights = items_list.weights.astype(np.float64)
+        self.penalty = float((items_list.values / items_list.weights).max())  # Value lost per unit of excess weight
+        self.best_value = 0
+        self.best_indices = []
+
+    # Value of feasible genomes, value minus a weight penalty for overweight ones
+    def population_fitness(self, population, sums):
+        excess = np.maximum(self.gene_sums(population, self.weights) - self.capacity, 0)
+        return sums - self.penalty * excess
+
+    def fitness(self, genome):
+        return float(self.population_fitness(genome[np.newaxis, :], np.array([self.gene_sum(genome)]))[0])
+
+    def generate_initial_population(self):
+        # Start around the capacity instead of frac_target
+        fill = min(1.0, self.capacity / max(1.0, self.weights.sum()))
+        self.population = self.rng.random((self.pop_size, len(self.items_list))) < fill
+
+    # Track the best feasible genome seen so far
+    def evolve_population(self):
+        feasible = self.gene_sums(self.population, self.weights) <= self.capacity
+        if feasible.any():
+            sums = np.where(feasible, self.gene_sums(self.population), -1)
+            best = int(np.argmax(sums))
+            if sums[best] > self.best_value:
+                self.best_value = int(sums[best])
+                self.best_indices = np.flatnonzero(self.population[best]).tolist()
+        super().evolve_population()
+
+# Exact weighted knapsack by dynamic programming over capacities, keeping one packed bit row of decisions per item
+def dp_knapsack(weights, values, capacity):
+    best = np.zeros(capacity + 1, dtype=np.int64)  # best[c]: best value with total weight at most c
+    decisions = []
+    for weight, value in zip(weights.tolist(), values.tolist()):
+        if weight > capacity:
+            decisions.append(None)
+            continue
+        candidate = best[:capacity + 1 - weight] + value
+        take = candidate > best[weight:]
+        best[weight:] = np.where(take, candidate, best[weight:])
+        decisions.append(np.packbits(take))
+
+    # Walk the decisions backwards from the full capacity
+    indices = []
+    remaining = capacity
+    for index in range(len(decisions) - 1, -1, -1):
+        weight = int(weights[index])
+        row = decisions[index]
+        if row is not None and remaining >= weight:
+            offset = remaining - weight
+            if row[offset >> 3] >> (7 - (offset & 7)) & 1:
+                indices.append(index)
+                remaining -= weight
+    return int(best[capacity]), indices[::-1]
+
+# Exact weighted knapsack by depth-first branch and bound over items sorted by value/weight ratio, bounded by the fractional (LP) relaxation.
+# Also returns whether the search finished; after bnb_node_limit nodes the result is only the best found so far
+def branch_and_bound_knapsack(weights, values, capacity):
+    order = sorted(range(len(weights)), key=lambda i: values[i] / weights[i], reverse=True)
+    w = [int(weights[i]) for i in order]
+    v = [int(values[i]) for i in order]
+    cumulative_w = list(itertools.accumulate(w, initial=0))
+    cumulative_v = list(itertools.accumulate(v, initial=0))
+    n = len(w)
+
+    # Fractional bound: fill greedily from position i and take a fraction of the first item that does not fit
+    def bound(i, weight, value):
+        room = capacity - weight
+        k = bisect.bisect_right(cumulative_w, cumulative_w[i] + room, lo=i) - 1
+        value += cumulative_v[k] - cumulative_v[i]
+        if k < n:
+            value += (room - (cumulative_w[k] - cumulative_w[i])) * v[k] / w[k]
+        return value
+
+    # Greedy solution as the first incumbent
+    best_value, best_chosen, weight = 0, [], 0
+    for i in range(n):
+        if weight + w[i] <= capacity:
+            weight += w[i]
+            best_value += v[i]
+            best_chosen.append(i)
+
+    # Stack entries: (position, weight, value, chosen positions as a linked list)
+    stack = [(0, 0, 0, None)]
+    nodes = 0
+    while stack and nodes < bnb_node_limit:
+        i, weight, value, chosen = stack.pop()
+        nodes += 1
+        if value > best_value:
+            best_value, best_chosen = value, chosen
+        if i == n or bound(i, weight, value) <= best_value:
+            continue
+        stack.append((i + 1, weight, value, chosen))
+        if weight + w[i] <= capacity:
+            stack.append((i + 1, weight + w[i], value + v[i], (i, chosen)))
+
+    if isinstance(best_chosen, list):
+        positions = best_chosen
+    else:
+        positions = []
+        while best_chosen is not None:
+            positions.append(best_chosen[0])
+            best_chosen = best_chosen[1]
+    return best_value, sorted(order[i] for i in positions), not stack
+
+# Generate a weighted instance: distinct values as in generate_items plus random weights, and its capacity
+def generate_weighted_items(count):
+    items_list = generate_items(count)
+    rng = np.random.default_rng(random.getrandbits(64))
+    items_list.weights = rng.integers(min_weight, max_weight + 1, size=count, dtype=np.int64)
+    capacity = int(items_list.weights.sum() * frac_capacity)
+    return items_list, capacity
+
+# Solve a weighted instance with the fastest suitable engine: DP for moderate capacities, then branch and bound, then the GA
+def solve_weighted(items_list, capacity, engine='auto'):
+    if engine == 'auto':
+        if len(items_list) * (capacity + 1) <= dp_cell_limit:
+            engine = 'dp'
+        elif len(items_list) <= bnb_item_limit:
+            engine = 'bnb'
+        else:
+            engine = 'ga'
+
+    start = time.perf_counter()
+    proven = engine != 'ga'
+    if engine == 'dp':
+        value, indices = dp_knapsack(items_list.weights, items_list.values, capacity)
+    elif engine == 'bnb':
+        value, indices, proven = branch_and_bound_knapsack(items_list.weights, items_list.values, capacity)
+    else:
+        ga = WeightedGeneticAlgorithm(items_list, capacity, pop_size, num_generations, mutation_rate, elitism_count)
+        while ga.generation < ga.num_generations:
+            ga.run_step()
+        value, indices = ga.best_value, ga.best_indices
+    return dict(engine=engine, value=value, indices=indices, proven=proven, wall_time=time.perf_counter() - start)
+
+# Process body of one island: evolve on request, taking in migrants first and sending back the best genomes
+def island_worker(connection, engine, items_list, target, pop_size, mutation_rate, elitism_count, seed):
+    random.seed(seed)
+    ga = ga_engines[engine](items_list, target, pop_size, math.inf, mutation_rate, elitism_count)
+    while True:
+        message = connection.recv()
+        if message is None:
+            break
+        generations, migrants = message
+        ga.immigrate(migrants)
+        for _ in range(generations):
+            ga.run_step()
+        connection.send(ga.emigrants(max(1, migration_count)))
+    connection.close()
+
+# Runs num_islands populations in separate processes and migrates their best genomes every migration_interval generations
+class IslandModel:
+    def __init__(self, items_list, target, pop_size, num_generations, mutation_rate, elitism_count):
+        self.items_list = items_list
+        self.target = target
+        self.pop_size = pop_size
+        self.num_generations = num_generations
+        self.mutation_rate = mutation_rate
+        self.elitism_count = elitism_count
+        self.generation = 0
+        self.best_genome = None
+        self.best_sum = 0
+        self.connections = []
+        self.processes = []
+        self.migrants = [[] for _ in range(num_islands)]
+
+    def fitness_from_sum(self, total_value):
+        return target_fitness(total_value, self.target)
+
+    def start_islands(self):
+        for _ in range(num_islands):
+            parent_connection, child_connection = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=island_worker, daemon=True,
+                                              args=(child_connection, island_engine, self.items_list, self.target, self.pop_size,
+                                                    self.mutation_rate, self.elitism_count, random.getrandbits(64)))
+            process.start()
+            child_connection.close()
+            self.connections.append(parent_connection)
+            self.processes.append(process)
+
+    # Island that sends its migrants to each island
+    def migration_sources(self):
+        if migration_topology == 'ring':
+            return [(i - 1) % num_islands for i in range(num_islands)]
+        return [random.choice([j for j in range(num_islands) if j != i] or [i]) for i in range(num_islands)]
+
+    # Evolve every island for one migration interval and collect the global best
+    def run_step(self):
+        if not self.processes:
+            self.start_islands()
+
+        generations = max(1, min(migration_interval, self.num_generations - self.generation))
+        for connection, migrants in zip(self.connections, self.migrants):
+            connection.send((generations, migrants))
+        bests = [connection.recv() for connection in self.connections]
+        self.generation += generations
+
+        for best in bests:
+            total = int(np.dot(np.asarray(best[0], dtype=np.int64), self.items_list.values))
+            if self.best_genome is None or self.fitness_from_sum(total) > self.fitness_from_sum(self.best_sum):
+                self.best_genome, self.best_sum = best[0], total
+        self.migrants = [bests[source][:migration_count] for source in self.migration_sources()]
+
+        return self.best_genome, self.generation
+
+    def close(self):
+        for connection in self.connections:
+            connection.send(None)
+            connection.close()
+        for process in self.processes:
+            process.join()
+        self.connections = []
+        self.processes = []
+
+# Genetic Algorithm engines selectable through ga_engine
+ga_engines = {'list': GeneticAlgorithm, 'numpy': VectorizedGeneticAlgorithm, 'islands': IslandModel}
+
 # The main UI class
 class UI(tk.Tk):
     def __init__(self):
@@ -183,7 +759,7 @@ class UI(tk.Tk):
         self.canvas = Canvas(self)
         self.canvas.place(x=0, y=0, width=self.width, height=self.height)
         self.canvas.configure(bg='white')  # Set background to white
-        self.items_list = []
+        self.items_list = ItemStore(np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.uint32))
 
         # Menu bar setup
         menu_bar = Menu(self)
@@ -197,32 +773,19 @@ class UI(tk.Tk):
 
         self.target = 0
 
+        # Canvas items that are created once and then updated in place
+        self.shown_bits = 0
+        self.sum_bar = None
+        self.sum_text = None
+        self.generation_text = None
+
         # Initialize Genetic Algorithm variables
         self.ga = None
-
-    def get_rand_item(self):
-        i1 = Item()
-        for i2 in self.items_list:
-            if i1.value == i2.value:
-                return None
-        return i1
-
-    def add_item(self):
-        item = self.get_rand_item()
-        while item is None:
-            item = self.get_rand_item()
-        self.items_list.append(item)
+        self.ga_job = None
 
     def generate_knapsack(self):
-        self.items_list.clear()  # Clear existing items
-        for i in range(num_items):
-            self.add_item()
-
-        item_max = 0
-        item_min = 9999
-        for item in self.items_list:
-            item_min = min(item_min, item.value)
-            item_max = max(item_max, item.value)
+        self.items_list = generate_items(num_items)
+        item_max = self.items_list.values.max()
 
         w = self.width - screen_padding
         h = self.height - screen_padding
@@ -230,23 +793,24 @@ class UI(tk.Tk):
         row_w = w / 8 - item_padding
         row_h = (h - 200) / num_rows
 
-        for x in range(0, 6):
-            for y in range(0, num_rows):
-                if x * num_rows + y >= num_items:
-                    break
-                item = self.items_list[x * num_rows + y]
-                item_w = row_w / 2
-                item_h = max(item.value / item_max * row_h, 1)
-                item.place(screen_padding + x * row_w + x * item_padding,
-                           screen_padding + y * row_h + y * item_padding,
-                           item_w,
-                           item_h)
+        # Lay the items out in 6 columns, all at once
+        index = np.arange(num_items)
+        x, y = index // num_rows, index % num_rows
+        rects = self.items_list.rects
+        rects[:, 0] = screen_padding + x * row_w + x * item_padding
+        rects[:, 1] = screen_padding + y * row_h + y * item_padding
+        rects[:, 2] = row_w / 2
+        rects[:, 3] = np.maximum(self.items_list.values / item_max * row_h, 1)
 
         self.clear_canvas()
         self.draw_items()
 
     def clear_canvas(self):
         self.canvas.delete("all")
+        self.shown_bits = 0
+        self.sum_bar = None
+        self.sum_text = None
+        self.generation_text = None
 
     def draw_items(self):
         for item in self.items_list:
@@ -269,72 +833,75 @@ class UI(tk.Tk):
             h *= (item_sum / target)
         else:
             h = 0
-        self.canvas.create_rectangle(x, y, x + w, y + h, fill='orange')
-        
+
         # Calculate the difference between sum and target
         difference = item_sum - target
         difference_text = f"({'+' if difference > 0 else ''}{int(difference)})" if difference != 0 else ""
-        
-        # Display sum with difference
+
+        # Display sum with difference, moving the existing bar and label when they are already drawn
         sum_text = f'Sum: {int(item_sum)}{difference_text}'
-        self.canvas.create_text(x + w // 2, y + h + screen_padding, 
-                              text=sum_text, 
-                              font=('Arial', 18, 'bold'), 
-                              fill='blue')
+        if self.sum_bar is None:
+            self.sum_bar = self.canvas.create_rectangle(x, y, x + w, y + h, fill='orange')
+            self.sum_text = self.canvas.create_text(x + w // 2, y + h + screen_padding,
+                                                    text=sum_text,
+                                                    font=('Arial', 18, 'bold'),
+                                                    fill='blue')
+        else:
+            self.canvas.coords(self.sum_bar, x, y, x + w, y + h)
+            self.canvas.coords(self.sum_text, x + w // 2, y + h + screen_padding)
+            self.canvas.itemconfig(self.sum_text, text=sum_text)
 
+    # Update only the items whose selection changed since the last drawn genome
     def draw_genome(self, genome, gen_num):
-        for idx, item in enumerate(self.items_list):
-            item.draw(self.canvas, active=genome[idx])
+        bits = pack_genome(genome)
+        for idx in set_bit_positions(bits ^ self.shown_bits):
+            self.items_list[idx].set_active(self.canvas, bool(bits >> idx & 1))
+        self.shown_bits = bits
+
         x = (self.width - screen_padding) / 8 * 6
         y = screen_padding
         w = (self.width - screen_padding) / 8 - screen_padding
         h = self.height / 4 * 3
-        self.canvas.create_text(x + w, y + h + screen_padding * 2, text=f'Generation {gen_num}', font=('Arial', 18, 'bold'), fill='red')
-
-    def get_item_sum(self, genome):
-        return sum(item.value for idx, item in enumerate(self.items_list) if genome[idx])
+        if self.generation_text is None:
+            self.generation_text = self.canvas.create_text(x + w, y + h + screen_padding * 2, text=f'Generation {gen_num}', font=('Arial', 18, 'bold'), fill='red')
+        else:
+            self.canvas.itemconfig(self.generation_text, text=f'Generation {gen_num}')
 
     def set_target(self):
-        target_set = []
-        for x in range(int(num_items * frac_target)):
-            item = self.items_list[random.randint(0, len(self.items_list) - 1)]
-            while item in target_set:
-                item = self.items_list[random.randint(0, len(self.items_list) - 1)]
-            target_set.append(item)
-        total = sum(item.value for item in target_set)
-        self.target = total
+        self.target = choose_target(self.items_list)
         self.clear_canvas()
         self.draw_items()
         self.draw_target()
 
     def start_ga(self):
+        self.stop_ga()
         if self.target == 0:
             self.set_target()
+        else:
+            self.clear_canvas()
+            self.draw_items()
+            self.draw_target()
 
-        self.ga = GeneticAlgorithm(self.items_list, self.target, pop_size, num_generations, mutation_rate, elitism_count)
+        self.ga = ga_engines[ga_engine](self.items_list, self.target, pop_size, num_generations, mutation_rate, elitism_count)
         self.ga.running = True
         self.run_ga_step()
 
     def run_ga_step(self):
-        if self.ga.generation == 0:
-            self.ga.generate_initial_population()
-
-        self.ga.evolve_population()
-        self.ga.generation += 1
-
-        best_genome, generation = self.ga.best_genome, self.ga.generation
-        item_sum = self.get_item_sum(best_genome)
+        self.ga_job = None
+        # Run several generations per rendered frame so drawing does not limit the solver
+        for _ in range(generations_per_frame):
+            best_genome, generation = self.ga.run_step()
+            if self.ga.best_sum == self.target or self.ga.generation >= self.ga.num_generations:
+                break
+        item_sum = self.ga.best_sum
 
         # Draw current state
-        self.clear_canvas()
-        self.draw_items()
         self.draw_genome(best_genome, generation)
-        self.draw_target()
         self.draw_sum(item_sum, self.target)
         self.update()
 
         # Print current generation info
-        print(f'Generation {generation}, Sum: {item_sum}, Fitness: {self.ga.fitness(best_genome)}')
+        print(f'Generation {generation}, Sum: {item_sum}, Fitness: {self.ga.fitness_from_sum(item_sum)}')
 
         # Check if we have met the target
         if item_sum == self.target:
@@ -342,12 +909,129 @@ class UI(tk.Tk):
             print('Exact solution found!')
         elif self.ga.running and self.ga.generation < self.ga.num_generations:
             # Continue to next step if target not met and we haven't reached max generations
-            self.after(sleep_time, self.run_ga_step)
+            self.ga_job = self.after(sleep_time, self.run_ga_step)
         else:
             self.ga.running = False
             print('Algorithm finished.')
 
+        cache = getattr(self.ga, 'fitness_cache', None)
+        if not self.ga.running and cache is not None:
+            print(f'Fitness cache: {cache.hits} hits, {cache.misses} misses ({cache.hit_rate():.1%} hit rate)')
+
+        if not self.ga.running and isinstance(self.ga, IslandModel):
+            self.ga.close()
+
+    # Cancel the pending step of the current GA and release its island processes
+    def stop_ga(self):
+        if self.ga_job is not None:
+            self.after_cancel(self.ga_job)
+            self.ga_job = None
+        if isinstance(self.ga, IslandModel):
+            self.ga.close()
+
+# Build one instance from a seed and run the GA on it without a display, returning a result record
+def run_headless(config):
+    if config.get('weighted'):
+        return run_headless_weighted(config)
+    random.seed(config['seed'])
+    items_list = generate_items(config['num_items'])
+    target = choose_target(items_list)
+    ga = ga_engines[config['engine']](items_list, target, config['pop_size'], config['num_generations'],
+                                      config['mutation_rate'], config['elitism_count'])
+
+    exact_generation = None
+    start = time.perf_counter()
+    while ga.generation < ga.num_generations:
+        ga.run_step()
+        if ga.best_sum == target:
+            exact_generation = ga.generation
+            break
+    wall_time = time.perf_counter() - start
+    if isinstance(ga, IslandModel):
+        ga.close()
+
+    evaluations = ga.generation * config['pop_size'] * (num_islands if isinstance(ga, IslandModel) else 1)
+    cache = getattr(ga, 'fitness_cache', None)
+    return dict(config,
+                cache_hits=cache.hits if cache else None,
+                cache_misses=cache.misses if cache else None,
+                target=target,
+                best_sum=ga.best_sum,
+                exact_generation=exact_generation,
+                generations=ga.generation,
+                wall_time=wall_time,
+                evals_per_sec=evaluations / wall_time if wall_time > 0 else None)
+
+# Build one weighted instance from a seed, solve it exactly when possible and report the GA's optimality gap
+def run_headless_weighted(config):
+    random.seed(config['seed'])
+    items_list, capacity = generate_weighted_items(config['num_items'])
+    exact = solve_weighted(items_list, capacity)
+    optimum = exact['value'] if exact['proven'] else None
+
+    ga = WeightedGeneticAlgorithm(items_list, capacity, config['pop_size'], config['num_generations'],
+                                  config['mutation_rate'], config['elitism_count'])
+    start = time.perf_counter()
+    while ga.generation < ga.num_generations and ga.best_value != optimum:
+        ga.run_step()
+    wall_time = time.perf_counter() - start
+
+    return dict(config,
+                capacity=capacity,
+                exact_engine=exact['engine'],
+                exact_proven=exact['proven'],
+                exact_time=exact['wall_time'],
+                optimum=optimum,
+                best_value=ga.best_value,
+                optimality_gap=(optimum - ga.best_value) / optimum if optimum else None,
+                generations=ga.generation,
+                wall_time=wall_time,
+                evals_per_sec=ga.generation * config['pop_size'] / wall_time if wall_time > 0 else None)
+
+# Command line entry point: no arguments opens the UI, --headless runs a batch of seeds and writes JSON lines
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Knapsack genetic algorithm')
+    parser.add_argument('--headless', action='store_true', help='run without a display and write JSON-lines results')
+    parser.add_argument('--weighted', action='store_true', help='weighted 0/1 knapsack instances, solved exactly and by the GA')
+    parser.add_argument('--seeds', type=int, default=10, help='number of seeds (one instance per seed)')
+    parser.add_argument('--first-seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=multiprocessing.cpu_count())
+    parser.add_argument('--output', default='-', help="results file, '-' for stdout")
+    parser.add_argument('--engine', choices=sorted(ga_engines), default=ga_engine)
+    parser.add_argument('--num-items', type=int, nargs='+', default=[num_items])
+    parser.add_argument('--pop-size', type=int, nargs='+', default=[pop_size])
+    parser.add_argument('--mutation-rate', type=float, nargs='+', default=[mutation_rate])
+    parser.add_argument('--elitism-count', type=int, default=elitism_count)
+    parser.add_argument('--generations', type=int, default=num_generations)
+    args = parser.parse_args(argv)
+
+    if not args.headless:
+        ui = UI()
+        ui.mainloop()
+        return
+    if args.engine == 'islands' and args.workers > 1 and not args.weighted:
+        parser.error('the islands engine starts its own processes; use --workers 1')
+
+    configs = [dict(seed=seed, engine='weighted' if args.weighted else args.engine, weighted=args.weighted, num_items=items, pop_size=size, mutation_rate=rate,
+                    elitism_count=args.elitism_count, num_generations=args.generations)
+               for items, size, rate, seed in itertools.product(args.num_items, args.pop_size, args.mutation_rate,
+                                                                range(args.first_seed, args.first_seed + args.seeds))]
+    output = sys.stdout if args.output == '-' else open(args.output, 'w')
+    try:
+        if args.workers > 1:
+            with multiprocessing.Pool(args.workers) as pool:
+                results = pool.imap_unordered(run_headless, configs)
+                for result in results:
+                    output.write(json.dumps(result) + '\n')
+                    output.flush()
+        else:
+            for config in configs:
+                output.write(json.dumps(run_headless(config)) + '\n')
+                output.flush()
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
 # Instantiate and run the UI
 if __name__ == '__main__':
-    ui = UI()
-    ui.mainloop()
\ No newline at end of file
+    main()
\ No newline at end of file
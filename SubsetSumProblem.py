@@ -1,34 +1,206 @@
+import heapq
 import math
 import random
 import tkinter as tk
 from tkinter import Menu, Canvas, FALSE
 import threading
 import time
+from collections import OrderedDict, deque
+
+import numpy as np
 
 # Number of items in the set
 num_items = 20
 min_value = 1
 max_value = 50
 target_value = random.randint(50, 200)
+failure_memo_size = 1 << 18  # (index, remaining) states remembered as failed by the backtracking solver
+frame_rate = 30  # Progress frames shown per second while a solver runs in the background
+progress_queue_size = 2  # Snapshots kept for the UI; older ones are dropped when a solver publishes faster
+pso_engine = 'numpy'  # 'list' for PSOSolver, 'numpy' for VectorizedPSOSolver
+row_block = 512  # Particles updated per block by the numpy engine (bounds the size of temporaries)
+heap_merge_min_items = 32  # From this many items meet-in-the-middle merges quarter lists with heaps (Schroeppel-Shamir)
+
+# Progress snapshots from a solver thread to the UI thread. Appending to a bounded deque is thread-safe and
+# silently drops the oldest snapshot, so a fast solver never waits for the display
+class ProgressQueue:
+    def __init__(self, size=None):
+        self.snapshots = deque(maxlen=size or progress_queue_size)
+
+    def publish(self, *snapshot):
+        self.snapshots.append(snapshot)
+
+    def latest(self):
+        # The newest snapshot (None if there is none), discarding the stale ones before it
+        snapshot = None
+        try:
+            while True:
+                snapshot = self.snapshots.popleft()
+        except IndexError:
+            return snapshot
+
+# Backtracking over the items sorted largest first: include or skip each one, with an explicit stack
+class BacktrackingSolver:
+    def __init__(self, items, target, progress=None):
+        self.items = items
+        self.target = target
+        self.progress = progress
+        self.order = sorted(range(len(items)), key=items.__getitem__, reverse=True)
+        self.values = [items[i] for i in self.order]
+        # suffix[k] is the most the items from position k on can still add
+        self.suffix = [0] * (len(items) + 1)
+        for k in range(len(items) - 1, -1, -1):
+            self.suffix[k] = self.suffix[k + 1] + self.values[k]
+        self.failed = OrderedDict()  # (position, remaining) states known to have no solution, oldest dropped first
+        self.nodes = 0
+        self.elapsed = 0.0
+
+    @property
+    def nodes_per_second(self):
+        return self.nodes / self.elapsed if self.elapsed else 0.0
+
+    def solve(self):
+        # Item indices summing to the target (positive values), or None
+        start = time.perf_counter()
+        try:
+            return self.search()
+        finally:
+            self.elapsed = time.perf_counter() - start
+
+    def search(self):
+        n, values, suffix, failed = len(self.values), self.values, self.suffix, self.failed
+        chosen = []  # Positions included on the current path
+        stack = [[0, self.target, 0]]  # Position, remaining sum, branch to try next (0 include, 1 skip, 2 done)
+        next_frame = 0.0
+        while stack:
+            frame = stack[-1]
+            position, remaining, branch = frame
+            if branch == 0:
+                self.nodes += 1
+                # Publish the current path about once per display frame (the clock is only read every 64 nodes)
+                if self.progress and self.nodes & 63 == 1 and time.perf_counter() >= next_frame:
+                    self.progress.publish('backtracking', self.nodes, self.target - remaining, [self.order[k] for k in chosen])
+                    next_frame = time.perf_counter() + 1 / frame_rate
+                if remaining == 0:
+                    return sorted(self.order[k] for k in chosen)
+                if position == n or suffix[position] < remaining or (position, remaining) in failed:
+                    stack.pop()
+                    continue
+                frame[2] = 1
+                if values[position] <= remaining:
+                    chosen.append(position)
+                    stack.append([position + 1, remaining - values[position], 0])
+                    continue
+            if frame[2] == 1:
+                # Including this item failed (or did not fit): skip it instead
+                if chosen and chosen[-1] == position:
+                    chosen.pop()
+                frame[2] = 2
+                stack.append([position + 1, remaining, 0])
+                continue
+            if len(failed) >= failure_memo_size:
+                failed.popitem(last=False)
+            failed[position, remaining] = True
+            stack.pop()
+        return None
 
-# Backtracking function to find the subset sum
-def subset_sum(items, target, partial=[], partial_sum=0, ui=None, iteration=[0]):
-    if ui:
-        iteration[0] += 1
-        ui.update_backtracking(iteration[0], partial_sum, partial)  # Pass `partial` to update_backtracking
-        time.sleep(0.5)
+# Indices of a subset of items summing to target, found by pruned backtracking
+def subset_sum(items, target, progress=None):
+    return BacktrackingSolver(items, target, progress).solve()
 
-    if partial_sum == target:
-        return partial
-    if partial_sum > target:
+# Exact dynamic programming over reachable sums, kept as the bits of one Python integer (bit s set = sum s reachable)
+def bitset_subset_sum(items, target):
+    if target < 0:
+        return None
+    mask = (1 << (target + 1)) - 1  # Sums above the target are never needed
+    block = max(1, math.isqrt(len(items)))
+    checkpoints = []  # Reachable sums before items 0, block, 2 * block, ...
+    reachable = 1
+    last = -1
+    while not reachable >> target & 1 and last + 1 < len(items):
+        last += 1
+        if last % block == 0:
+            checkpoints.append(reachable)
+        reachable |= (reachable << items[last]) & mask
+    if not reachable >> target & 1:
         return None
 
-    for i in range(len(items)):
-        remaining = items[i + 1:]
-        result = subset_sum(remaining, target, partial + [items[i]], partial_sum + items[i], ui, iteration)
-        if result is not None:
-            return result
+    # Walk back from the last item used: item i is needed exactly when the remaining sum was not reachable before it
+    indices = []
+    remaining = target
+    for start in range(last - last % block, -1, -block):
+        before = [checkpoints[start // block]]
+        for i in range(start, min(start + block, last + 1) - 1):
+            before.append(before[-1] | (before[-1] << items[i]) & mask)
+        for i in range(min(start + block, last + 1) - 1, start - 1, -1):
+            if not before[i - start] >> remaining & 1:
+                indices.append(i)
+                remaining -= items[i]
+    return indices[::-1]
+
+# All subset sums of items in ascending order, with bit offset + k of each mask marking item k
+def subset_sums(items, offset=0):
+    sums, masks = [0], [0]
+    for k, value in enumerate(items):
+        bit = 1 << (offset + k)
+        sums += [total + value for total in sums]
+        masks += [mask | bit for mask in masks]
+    order = sorted(range(len(sums)), key=sums.__getitem__)
+    return [sums[i] for i in order], [masks[i] for i in order]
+
+def mask_indices(mask):
+    return [i for i in range(mask.bit_length()) if mask >> i & 1]
+
+# Exact solver for values too large for the bitset DP: join the sorted subset sums of both halves with two pointers
+def meet_in_the_middle_subset_sum(items, target):
+    if len(items) >= heap_merge_min_items:
+        return schroeppel_shamir_subset_sum(items, target)
+    half = len(items) // 2
+    left_sums, left_masks = subset_sums(items[:half])
+    right_sums, right_masks = subset_sums(items[half:], half)
+    i, j = 0, len(right_sums) - 1
+    while i < len(left_sums) and j >= 0:
+        total = left_sums[i] + right_sums[j]
+        if total == target:
+            return mask_indices(left_masks[i] | right_masks[j])
+        if total < target:
+            i += 1
+        else:
+            j -= 1
+    return None
 
+# Sums a + b of two sorted lists in ascending (or descending) order, keeping one heap entry per element of the first
+def merged_sums(first, second, descending=False):
+    sign = -1 if descending else 1
+    start = len(second) - 1 if descending else 0
+    heap = [(sign * (a + second[start]), i, start) for i, a in enumerate(first)]
+    heapq.heapify(heap)
+    while heap:
+        key, i, j = heap[0]
+        yield sign * key, i, j
+        j += -1 if descending else 1
+        if 0 <= j < len(second):
+            heapq.heapreplace(heap, (sign * (first[i] + second[j]), i, j))
+        else:
+            heapq.heappop(heap)
+
+# Meet-in-the-middle over four quarters: both half sums are streamed from heaps instead of stored, so memory stays O(2^(n/4))
+def schroeppel_shamir_subset_sum(items, target):
+    n = len(items)
+    cuts = [0, n // 4, n // 2, n // 2 + (n - n // 2) // 2, n]
+    quarters = [subset_sums(items[cuts[k]:cuts[k + 1]], cuts[k]) for k in range(4)]
+    (a_sums, a_masks), (b_sums, b_masks), (c_sums, c_masks), (d_sums, d_masks) = quarters
+    low = merged_sums(a_sums, b_sums)
+    high = merged_sums(c_sums, d_sums, descending=True)
+    lo, hi = next(low, None), next(high, None)
+    while lo is not None and hi is not None:
+        total = lo[0] + hi[0]
+        if total == target:
+            return mask_indices(a_masks[lo[1]] | b_masks[lo[2]] | c_masks[hi[1]] | d_masks[hi[2]])
+        if total < target:
+            lo = next(low, None)
+        else:
+            hi = next(high, None)
     return None
 
 # Particle Swarm Optimization for Subset Sum Problem
@@ -56,7 +228,7 @@ class Particle:
                 self.position[i] = 0
 
 class PSOSolver:
-    def __init__(self, items, target, num_particles=30, max_iterations=100, ui=None):
+    def __init__(self, items, target, num_particles=30, max_iterations=100, progress=None):
         self.items = items
         self.target = target
         self.num_particles = num_particles
@@ -64,7 +236,7 @@ class PSOSolver:
         self.particles = [Particle(len(items)) for _ in range(num_particles)]
         self.global_best_position = [0] * len(items)
         self.global_best_value = float('inf')
-        self.ui = ui
+        self.progress = progress
 
     def fitness(self, position):
         subset_sum = sum(self.items[i] for i in range(len(position)) if position[i] == 1)
@@ -87,16 +259,78 @@ class PSOSolver:
                 particle.update_velocity(self.global_best_position, w=0.7, c1=1.8, c2=1.8)
                 particle.update_position()
 
-            if self.ui:
-                self.ui.update_pso(self.global_best_position, iteration, self.global_best_value)
-                self.ui.update()  # Immediately update the UI to reflect the new state
-                time.sleep(0.2)  # Pause to allow visualization
+            if self.progress:
+                chosen = [i for i, selected in enumerate(self.global_best_position) if selected]
+                self.progress.publish('pso', chosen, iteration, self.global_best_value)
 
             if self.global_best_value == 0:
                 break
 
         return self.global_best_position if self.global_best_value == 0 else None
 
+# The same swarm as PSOSolver held as (particles x items) arrays and updated with array operations
+class VectorizedPSOSolver:
+    def __init__(self, items, target, num_particles=30, max_iterations=100, progress=None):
+        self.items = items
+        self.values = np.asarray(items, dtype=np.float64)
+        self.target = target
+        self.num_particles = num_particles
+        self.max_iterations = max_iterations
+        self.progress = progress
+        self.rng = np.random.default_rng(random.getrandbits(64))
+        shape = (num_particles, len(items))
+        self.positions = self.rng.random(shape, dtype=np.float32) < 0.5
+        self.velocities = self.rng.uniform(-1, 1, shape).astype(np.float32)
+        self.best_positions = self.positions.copy()
+        self.best_values = np.full(num_particles, np.inf)
+        self.global_best_position = np.zeros(len(items), dtype=bool)
+        self.global_best_value = float('inf')
+
+    # Distance below the target for every particle (inf above it), one matrix-vector product per block of rows
+    def fitness(self, positions):
+        sums = np.empty(len(positions), dtype=np.float64)
+        for start in range(0, len(positions), row_block):
+            sums[start:start + row_block] = positions[start:start + row_block].astype(np.float64) @ self.values
+        return np.where(sums > self.target, np.inf, self.target - sums)
+
+    def update_swarm(self, w, c1, c2):
+        # Velocity and sigmoid position update; each block takes all its random numbers in one draw
+        global_best = self.global_best_position.astype(np.float32)
+        for start in range(0, self.num_particles, row_block):
+            rows = slice(start, start + row_block)
+            positions = self.positions[rows].astype(np.float32)
+            velocities = self.velocities[rows]
+            r1, r2, disturbance, threshold = self.rng.random((4,) + positions.shape, dtype=np.float32)
+            velocities *= w
+            velocities += c1 * r1 * (self.best_positions[rows] - positions)
+            velocities += c2 * r2 * (global_best - positions)
+            velocities += 0.2 * disturbance - 0.1
+            with np.errstate(over='ignore'):
+                self.positions[rows] = threshold < 1 / (1 + np.exp(-velocities))
+
+    def solve(self):
+        for iteration in range(self.max_iterations):
+            values = self.fitness(self.positions)
+            improved = values < self.best_values
+            self.best_values[improved] = values[improved]
+            self.best_positions[improved] = self.positions[improved]
+            best = int(np.argmin(values))
+            if values[best] < self.global_best_value:
+                self.global_best_value = float(values[best])
+                self.global_best_position = self.positions[best].copy()
+
+            self.update_swarm(w=0.7, c1=1.8, c2=1.8)
+
+            if self.progress:
+                self.progress.publish('pso', np.flatnonzero(self.global_best_position).tolist(), iteration, self.global_best_value)
+
+            if self.global_best_value == 0:
+                break
+
+        return self.global_best_position.astype(int).tolist() if self.global_best_value == 0 else None
+
+pso_engines = {'list': PSOSolver, 'numpy': VectorizedPSOSolver}
+
 # Main UI Class
 class SubsetSumUI(tk.Tk):
     def __init__(self):
@@ -119,14 +353,19 @@ class SubsetSumUI(tk.Tk):
         menu_SS.add_command(label="Generate Set", command=self.generate_set, underline=0)
         menu_SS.add_command(label="Solve with Backtracking", command=self.start_backtracking_solver, underline=0)
         menu_SS.add_command(label="Solve with PSO", command=self.start_pso_solver, underline=0)
+        menu_SS.add_command(label="Solve with Bitset DP", command=self.start_bitset_solver, underline=11)
+        menu_SS.add_command(label="Solve with Meet in the Middle", command=self.start_meet_in_the_middle_solver, underline=11)
 
         self.items_list = []
         self.target = target_value
         self.solution = None
         self.partial_visuals = []
+        self.progress = ProgressQueue()  # Snapshots from the running background solver
+        self.polling = False
 
     def generate_set(self):
         self.items_list = [random.randint(min_value, max_value) for _ in range(num_items)]
+        self.progress = ProgressQueue()  # A background run on the previous set is no longer shown
         self.clear_canvas()
         self.draw_target()
         self.draw_items()
@@ -155,12 +394,13 @@ class SubsetSumUI(tk.Tk):
         self.draw_target()
         self.draw_items()
 
-        threading.Thread(target=self.run_backtracking_solver).start()
+        self.start_worker(self.run_backtracking_solver)
 
-    def run_backtracking_solver(self):
-        iteration = [0]
-        self.solution = subset_sum(self.items_list, self.target, ui=self, iteration=iteration)
-        self.after(0, self.draw_solution)
+    def run_backtracking_solver(self, progress):
+        solver = BacktrackingSolver(self.items_list, self.target, progress)
+        indices = solver.solve()
+        print(f"Backtracking: {solver.nodes} nodes, {solver.nodes_per_second:.0f} nodes/s")
+        progress.publish('done', indices)
 
     def start_pso_solver(self):
         if not self.items_list:
@@ -170,60 +410,104 @@ class SubsetSumUI(tk.Tk):
         self.draw_target()
         self.draw_items()
 
-        threading.Thread(target=self.run_pso_solver).start()
+        self.start_worker(self.run_pso_solver)
 
-    def run_pso_solver(self):
-        pso_solver = PSOSolver(self.items_list, self.target, ui=self)
+    def run_pso_solver(self, progress):
+        pso_solver = pso_engines[pso_engine](self.items_list, self.target, progress=progress)
         pso_solution = pso_solver.solve()
-        self.solution = [self.items_list[i] for i in range(len(self.items_list)) if pso_solution and pso_solution[i] == 1]
-        self.after(0, self.draw_solution)
+        progress.publish('done', [i for i, selected in enumerate(pso_solution or []) if selected])
+
+    def start_worker(self, run):
+        # Run a solver on a background thread; it only talks to the UI through its own progress queue
+        self.progress = ProgressQueue()
+        threading.Thread(target=run, args=(self.progress,), daemon=True).start()
+        if not self.polling:
+            self.polling = True
+            self.after(0, self.poll_progress)
+
+    def poll_progress(self):
+        # Show the newest snapshot once per frame on the tkinter thread
+        snapshot = self.progress.latest()
+        if snapshot is not None:
+            kind, *data = snapshot
+            if kind == 'done':
+                indices = data[0]
+                self.solution = [self.items_list[i] for i in indices] if indices is not None else None
+                self.draw_solution()
+                self.polling = False
+                return
+            if kind == 'backtracking':
+                self.update_backtracking(*data)
+            else:
+                self.update_pso(*data)
+        self.after(int(1000 / frame_rate), self.poll_progress)
+
+    def start_bitset_solver(self):
+        self.run_exact_solver('Bitset DP', bitset_subset_sum)
+
+    def start_meet_in_the_middle_solver(self):
+        self.run_exact_solver('Meet in the Middle', meet_in_the_middle_subset_sum)
+
+    def run_exact_solver(self, name, solve):
+        if not self.items_list:
+            self.generate_set()
+
+        self.clear_canvas()  # Clear previous solution
+        self.draw_target()
+        self.draw_items()
+        self.progress = ProgressQueue()  # Snapshots of a background run still going are no longer shown
+
+        # Exact solvers returning item indices, fast enough for the default set to run on the UI thread
+        start = time.perf_counter()
+        indices = solve(self.items_list, self.target)
+        elapsed = time.perf_counter() - start
+        for i in indices or []:
+            rect, text = self.partial_visuals[i]
+            self.canvas.itemconfig(rect, fill='black')
+        self.canvas.create_text(400, 50, text=f'{name}: {elapsed * 1000:.2f} ms', font=('Arial', 16, 'bold'), fill='black', tag='iteration_info')
+        self.solution = [self.items_list[i] for i in indices] if indices is not None else None
+        self.draw_solution()
 
     def update_partial(self, partial, partial_sum):
         self.clear_partial_highlights()
-        for value in partial:
-            for i, item_value in enumerate(self.items_list):
-                if item_value == value:
-                    rect, text = self.partial_visuals[i]
-                    self.canvas.itemconfig(rect, fill='black')
-                    break
+        for i in partial:
+            rect, text = self.partial_visuals[i]
+            self.canvas.itemconfig(rect, fill='black')
 
         difference = self.target - partial_sum
         sign = '+' if difference > 0 else ''
         self.canvas.create_text(400, 50, text=f'Current Partial Sum: {partial_sum} (Difference: {sign}{difference})',
                                 font=('Arial', 16, 'bold'), fill='yellow', tag='partial_sum')
 
-    def update_backtracking(self, iteration, partial_sum, partial=[]):
+    def update_backtracking(self, iteration, partial_sum, partial=()):
         self.canvas.delete('iteration_info')
         difference = self.target - partial_sum
         sign = '+' if difference > 0 else ''
 
-        # Highlight the selected stack
+        # Highlight the items on the current path
         self.clear_partial_highlights()  # Clear previous highlights
-        for value in partial:
-            for i, item_value in enumerate(self.items_list):
-                if item_value == value:
-                    rect, text = self.partial_visuals[i]
-                    self.canvas.itemconfig(rect, fill='black')
+        for i in partial:
+            rect, text = self.partial_visuals[i]
+            self.canvas.itemconfig(rect, fill='black')
 
-        self.canvas.create_text(600, 50, text=f'Backtracking Iteration: {iteration}, Partial Sum: {partial_sum} (Difference: {sign}{difference})', font=('Arial', 16, 'bold'), fill='black', tag='iteration_info')
+        self.canvas.create_text(600, 50, text=f'Backtracking Node: {iteration}, Partial Sum: {partial_sum} (Difference: {sign}{difference})', font=('Arial', 16, 'bold'), fill='black', tag='iteration_info')
 
     def clear_partial_highlights(self):
         for rect, text in self.partial_visuals:
             self.canvas.itemconfig(rect, fill='lightblue')
         self.canvas.delete('partial_sum')
 
-    def update_pso(self, best_position, iteration, best_value):
+    def update_pso(self, best_indices, iteration, best_value):
         self.clear_partial_highlights()
         self.canvas.delete('iteration_info')
 
-        current_sum = sum(self.items_list[i] for i in range(len(best_position)) if best_position[i] == 1)
+        current_sum = sum(self.items_list[i] for i in best_indices)
         difference = current_sum - self.target
         sign = '+' if difference > 0 else ''
 
-        for i, selected in enumerate(best_position):
-            if selected == 1:
-                rect, text = self.partial_visuals[i]
-                self.canvas.itemconfig(rect, fill='black')
+        for i in best_indices:
+            rect, text = self.partial_visuals[i]
+            self.canvas.itemconfig(rect, fill='black')
 
         if best_value == 0:
             status_text = "Perfect Match Found!"
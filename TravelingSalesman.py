@@ -1,13 +1,54 @@
 import math
+import multiprocessing
+import os
 import random
+import time
 import tkinter as tk
-from tkinter import Menu, FALSE, Canvas
+from array import array
+from collections import deque
+
+import numpy as np
+from tkinter import Menu, FALSE, Canvas, filedialog
 
 # Configuration parameters
 num_cities = 25  # Number of cities to visit in the Traveling Salesman Problem
 city_scale = 5  # Scale for drawing city nodes
 road_width = 2  # Width of roads (edges) in the UI
 padding = 50  # Padding for the canvas
+frame_rate = 30  # Target redraws per second while a solver runs; the solver iterates for the rest of each frame
+neighbour_count = 10  # Candidate neighbours per city tried by the local search
+post_optimize = True  # Polish the annealing result with 2-opt / Or-opt local search
+distance_backend = 'auto'  # 'list', 'dense', 'ondemand' or 'auto' (chosen from the number of cities)
+list_distance_limit = 500  # Largest number of cities kept in a nested-list distance matrix by 'auto'
+dense_distance_limit = 5000  # Largest number of cities given a float32 NumPy distance matrix by 'auto'
+distance_cache_size = 0  # City pairs remembered by the on-demand backend (0 disables the cache)
+distance_block = 1 << 22  # Distances computed at once when building matrices and neighbour lists
+construction = 'nearest'  # Initial tour: 'nearest', 'greedy', 'hilbert', 'insertion' or 'best' (shortest of all four)
+points_per_cell = 2  # Average number of cities per spatial grid cell
+
+# Parallel tempering parameters
+tempering_replicas = multiprocessing.cpu_count()  # Annealing chains, one process each
+tempering_max_temperature = 1000  # Hottest rung of the temperature ladder
+tempering_min_temperature = 1  # Coldest rung of the temperature ladder
+tempering_steps = 2000  # Annealing iterations per replica between two exchange attempts
+tempering_rounds = 200  # Exchange rounds before the run stops
+
+# Ant colony parameters
+aco_variant = 'mmas'  # 'mmas' (MAX-MIN Ant System) or 'as' (Ant System)
+aco_ants = 20  # Ants constructing a tour every iteration
+aco_iterations = 200  # Colony iterations before the run stops
+aco_alpha = 1.0  # Weight of the pheromone in the transition rule
+aco_beta = 3.0  # Weight of the inverse distance in the transition rule
+aco_evaporation = 0.1  # Fraction of pheromone evaporating every iteration
+aco_candidate_count = 15  # Nearest cities an ant chooses among before falling back to the nearest unvisited one
+aco_workers = 1  # Processes constructing ant tours (1 builds them in this process)
+aco_shading_threshold = 0.05  # Weakest pheromone, relative to the strongest, drawn as a shaded edge
+
+# Lower bound parameters
+gap_threshold = 0.01  # Stop once the best tour is provably within this fraction of the optimum
+exact_bound_limit = 20  # Largest instance solved exactly by the bitmask DP (2^(n-1) * (n-1) floats: about 80 MB and 1 s at 20 cities)
+held_karp_city_limit = 1000  # Largest instance given a Held-Karp bound (each 1-tree costs O(n^2))
+held_karp_iterations = 100  # Subgradient steps of the Held-Karp ascent
 
 class Node:
     def __init__(self, x, y, index):
@@ -16,19 +57,20 @@ class Node:
         self.index = index  # Unique identifier for the city
 
     def draw(self, canvas, color='yellow'):
-        # Draw the city node as a circle on the canvas
-        canvas.create_oval(
+        # Draw the city node as a circle on the canvas, returning the ids of the circle and its label
+        oval = canvas.create_oval(
             self.x - city_scale * 2, self.y - city_scale * 2,
             self.x + city_scale * 2, self.y + city_scale * 2,
             fill=color, outline='black'
         )
         # Draw the city index number next to the city node
-        canvas.create_text(
+        label = canvas.create_text(
             self.x, self.y - city_scale * 3,
             text=str(self.index),
             font=('Arial', 12),
             fill='blue'
         )
+        return oval, label
 
 
 class Edge:
@@ -49,33 +91,715 @@ class Edge:
             **kwargs
         )
 
-class TSP_Solver:
+def geo_radians(values):
+    # TSPLIB GEO coordinates are DDD.MM (degrees and minutes); the degrees are truncated as in the reference code
+    degrees = np.trunc(values)
+    return 3.141592 * (degrees + 5.0 * (values - degrees) / 3.0) / 180.0
+
+def metric_distances(metric, xa, ya, xb, yb):
+    # Vectorised distances under a TSPLIB EDGE_WEIGHT_TYPE, or unrounded 'euclidean' for generated cities
+    if metric == 'euclidean':
+        return np.hypot(xa - xb, ya - yb)
+    if metric == 'EUC_2D':
+        return np.floor(np.hypot(xa - xb, ya - yb) + 0.5)
+    if metric == 'CEIL_2D':
+        return np.ceil(np.hypot(xa - xb, ya - yb))
+    if metric == 'MAN_2D':
+        return np.floor(np.abs(xa - xb) + np.abs(ya - yb) + 0.5)
+    if metric == 'MAX_2D':
+        return np.floor(np.maximum(np.abs(xa - xb), np.abs(ya - yb)) + 0.5)
+    if metric == 'ATT':
+        r = np.sqrt(((xa - xb) ** 2 + (ya - yb) ** 2) / 10.0)
+        t = np.floor(r + 0.5)
+        return np.where(t < r, t + 1, t)
+    if metric == 'GEO':
+        lat_a, lon_a, lat_b, lon_b = geo_radians(xa), geo_radians(ya), geo_radians(xb), geo_radians(yb)
+        q1 = np.cos(lon_a - lon_b)
+        q2 = np.cos(lat_a - lat_b)
+        q3 = np.cos(lat_a + lat_b)
+        return np.floor(6378.388 * np.arccos(np.clip(0.5 * ((1 + q1) * q2 - (1 - q1) * q3), -1, 1)) + 1.0)
+    raise ValueError(f"Unsupported distance metric: {metric}")
+
+class DistanceBackend:
+    # Distances between cities under a metric (see metric_distances), indexed as backend[a][b] like a nested-list matrix
+    def __init__(self, xs, ys, metric='euclidean'):
+        self.xs = np.asarray(xs, dtype=np.float64)
+        self.ys = np.asarray(ys, dtype=np.float64)
+        self.metric = metric
+
+    def __len__(self):
+        return len(self.xs)
+
+    def rows(self, start, stop):
+        # Distances from cities start..stop-1 to every city, as a float64 array
+        return metric_distances(self.metric, self.xs[start:stop, np.newaxis], self.ys[start:stop, np.newaxis], self.xs, self.ys)
+
+    def edge_lengths(self, a, b):
+        # Distances between the cities of two equally shaped index arrays
+        return metric_distances(self.metric, self.xs[a], self.ys[a], self.xs[b], self.ys[b])
+
+    def nearest(self, k):
+        # The k nearest cities of every city, nearest first, computed a block of rows at a time
+        n = len(self)
+        k = min(k, n - 1)
+        neighbours = []
+        if k <= 0:
+            return [[] for _ in range(n)]
+        block = max(1, distance_block // n)
+        for start in range(0, n, block):
+            distances = self.rows(start, min(n, start + block))
+            distances[np.arange(len(distances)), np.arange(start, start + len(distances))] = np.inf
+            candidates = np.argpartition(distances, k - 1, axis=1)[:, :k]
+            order = np.argsort(np.take_along_axis(distances, candidates, axis=1), axis=1, kind='stable')
+            neighbours.extend(np.take_along_axis(candidates, order, axis=1).tolist())
+        return neighbours
+
+class ListDistances(DistanceBackend):
+    # Full matrix as nested Python lists: fastest lookups, only for small instances
+    def __init__(self, xs, ys, metric='euclidean'):
+        super().__init__(xs, ys, metric)
+        self.matrix = [self.rows(i, i + 1)[0].tolist() for i in range(len(self))]
+
+    def __getitem__(self, a):
+        return self.matrix[a]
+
+class DenseDistances(DistanceBackend):
+    # Full float32 matrix built with array operations
+    def __init__(self, xs, ys, metric='euclidean'):
+        super().__init__(xs, ys, metric)
+        n = len(self)
+        self.matrix = np.empty((n, n), dtype=np.float32)
+        block = max(1, distance_block // max(1, n))
+        for start in range(0, n, block):
+            self.matrix[start:start + block] = DistanceBackend.rows(self, start, start + block)
+
+    def __getitem__(self, a):
+        return DistanceRow(self, a)
+
+    def dist(self, a, b):
+        return float(self.matrix[a, b])
+
+    def rows(self, start, stop):
+        return self.matrix[start:stop].astype(np.float64)
+
+    def edge_lengths(self, a, b):
+        return self.matrix[a, b].astype(np.float64)
+
+class OnDemandDistances(DistanceBackend):
+    # Distances computed from the coordinates when asked for, with an optional bounded cache of hot pairs
+    def __init__(self, xs, ys, cache_size=0, metric='euclidean'):
+        super().__init__(xs, ys, metric)
+        self.x_list = self.xs.tolist()
+        self.y_list = self.ys.tolist()
+        self.cache_size = cache_size
+        self.cache = {}
+
+    def __getitem__(self, a):
+        return DistanceRow(self, a)
+
+    def nearest(self, k):
+        # Neighbour lists from the spatial grid instead of full rows of distances (by planar proximity,
+        # which only approximates the order of GEO, MAN_2D and MAX_2D distances)
+        grid = SpatialGrid(self.x_list, self.y_list)
+        return [grid.k_nearest(city, k) for city in range(len(self))]
+
+    def measure(self, a, b):
+        if self.metric == 'euclidean':
+            return math.hypot(self.x_list[a] - self.x_list[b], self.y_list[a] - self.y_list[b])
+        return float(metric_distances(self.metric, self.xs[a], self.ys[a], self.xs[b], self.ys[b]))
+
+    def dist(self, a, b):
+        if not self.cache_size:
+            return self.measure(a, b)
+        key = (a, b) if a < b else (b, a)
+        distance = self.cache.get(key)
+        if distance is None:
+            distance = self.measure(a, b)
+            if len(self.cache) >= self.cache_size:
+                self.cache.clear()  # Start over rather than track recency on every lookup
+            self.cache[key] = distance
+        return distance
+
+class ExplicitDistances(DistanceBackend):
+    # A given weight matrix (TSPLIB EXPLICIT instances); xs and ys only serve the construction heuristics
+    def __init__(self, xs, ys, matrix):
+        super().__init__(xs, ys, 'explicit')
+        self.matrix = np.asarray(matrix, dtype=np.float64)
+        self.lists = self.matrix.tolist() if len(self) <= list_distance_limit else None
+
+    def __getitem__(self, a):
+        return self.lists[a] if self.lists is not None else DistanceRow(self, a)
+
+    def dist(self, a, b):
+        return float(self.matrix[a, b])
+
+    def rows(self, start, stop):
+        return self.matrix[start:stop].astype(np.float64)
+
+    def edge_lengths(self, a, b):
+        return self.matrix[a, b].astype(np.float64)
+
+class DistanceRow:
+    # One row of a distance backend, so that backend[a][b] reads like a matrix lookup
+    __slots__ = ('backend', 'a')
+
+    def __init__(self, backend, a):
+        self.backend = backend
+        self.a = a
+
+    def __getitem__(self, b):
+        return self.backend.dist(self.a, b)
+
+    def __len__(self):
+        return len(self.backend)
+
+def make_distances(xs, ys, backend=None, metric='euclidean'):
+    # Pick the distance backend by name, or by instance size for 'auto'
+    backend = backend or distance_backend
+    if backend == 'auto':
+        n = len(xs)
+        backend = 'list' if n <= list_distance_limit else 'dense' if n <= dense_distance_limit else 'ondemand'
+    if backend == 'list':
+        return ListDistances(xs, ys, metric)
+    if backend == 'dense':
+        return DenseDistances(xs, ys, metric)
+    return OnDemandDistances(xs, ys, distance_cache_size, metric)
+
+weight_formats = {
+    # EDGE_WEIGHT_FORMAT -> (triangle, diagonal offset) of the row-major order the weights are listed in;
+    # the column-major formats list the other triangle row by row
+    'UPPER_ROW': ('upper', 1), 'LOWER_COL': ('upper', 1),
+    'LOWER_ROW': ('lower', -1), 'UPPER_COL': ('lower', -1),
+    'UPPER_DIAG_ROW': ('upper', 0), 'LOWER_DIAG_COL': ('upper', 0),
+    'LOWER_DIAG_ROW': ('lower', 0), 'UPPER_DIAG_COL': ('lower', 0),
+}
+
+class TsplibInstance:
+    # A TSPLIB problem: its header fields, a (2, n) coordinate array and, for EXPLICIT instances, the weight matrix
+    def __init__(self, header, coords, weights=None):
+        self.header = header
+        self.name = header.get('NAME', '')
+        self.metric = header.get('EDGE_WEIGHT_TYPE', 'EUC_2D')
+        self.coords = coords  # Display coordinates only for EXPLICIT instances
+        self.weights = weights
+
+    def __len__(self):
+        return self.coords.shape[1]
+
+    def distances(self):
+        # A distance backend measuring the instance's own metric
+        if self.weights is not None:
+            return ExplicitDistances(self.coords[0], self.coords[1], self.weights)
+        return make_distances(self.coords[0], self.coords[1], metric=self.metric)
+
+    def display_coords(self):
+        # Planar x and y (y upwards); GEO coordinates are latitude, longitude
+        if self.metric == 'GEO':
+            return self.coords[1], self.coords[0]
+        return self.coords[0], self.coords[1]
+
+def read_coordinates(lines, n):
+    # The next n "id x y" lines as a (2, n) array
+    coords = np.empty((2, n), dtype=np.float64)
+    for k in range(n):
+        fields = next(lines).split()
+        coords[0, k] = float(fields[1])
+        coords[1, k] = float(fields[2])
+    return coords
+
+def read_weights(lines, n, weight_format):
+    # The next weights of an EDGE_WEIGHT_SECTION as a full symmetric (n, n) matrix
+    if weight_format == 'FULL_MATRIX':
+        count = n * n
+    else:
+        if weight_format not in weight_formats:
+            raise ValueError(f"Unsupported EDGE_WEIGHT_FORMAT: {weight_format}")
+        triangle, offset = weight_formats[weight_format]
+        count = n * (n + 1) // 2 if offset == 0 else n * (n - 1) // 2
+    values = np.empty(count, dtype=np.float64)
+    filled = 0
+    while filled < count:
+        row = np.array(next(lines).split(), dtype=np.float64)
+        values[filled:filled + len(row)] = row[:count - filled]
+        filled += len(row)
+    if weight_format == 'FULL_MATRIX':
+        return values.reshape(n, n)
+    matrix = np.zeros((n, n), dtype=np.float64)
+    rows, cols = np.triu_indices(n, offset) if triangle == 'upper' else np.tril_indices(n, offset)
+    matrix[rows, cols] = values
+    matrix[cols, rows] = values
+    return matrix
+
+def sidecar_is_fresh(sidecar, path):
+    return os.path.exists(sidecar) and os.path.getmtime(sidecar) >= os.path.getmtime(path)
+
+def read_tsplib(path):
+    # Stream a TSPLIB .tsp file. Its coordinates (and explicit weights) are saved to .npy sidecars next to it,
+    # which later loads memory-map instead of parsing the file again
+    coords_path, weights_path = path + '.coords.npy', path + '.weights.npy'
+    header = {}
+    coords = weights = None
+    with open(path) as f:
+        lines = filter(str.strip, f)
+        for line in lines:
+            key, _, value = line.partition(':')
+            key = key.strip().upper()
+            if key == 'EOF':
+                break
+            if not key.endswith('_SECTION'):
+                header[key] = value.strip()
+                continue
+            explicit = header.get('EDGE_WEIGHT_TYPE') == 'EXPLICIT'
+            if coords is None and weights is None and sidecar_is_fresh(coords_path, path) and \
+                    (not explicit or sidecar_is_fresh(weights_path, path)):
+                coords = np.load(coords_path, mmap_mode='r')
+                weights = np.load(weights_path, mmap_mode='r') if explicit else None
+                return TsplibInstance(header, coords, weights)
+            n = int(header['DIMENSION'])
+            if key in ('NODE_COORD_SECTION', 'DISPLAY_DATA_SECTION'):
+                coords = read_coordinates(lines, n)
+            elif key == 'EDGE_WEIGHT_SECTION':
+                weights = read_weights(lines, n, header.get('EDGE_WEIGHT_FORMAT', 'FULL_MATRIX'))
+            else:
+                # Sections the solver has no use for (fixed edges, demands, ...) end with -1
+                for line in lines:
+                    if line.split()[0] == '-1':
+                        break
+    if header.get('TYPE', 'TSP').split()[0] != 'TSP':
+        raise ValueError(f"Only symmetric TSP instances are supported, not {header.get('TYPE')}")
+    metric = header.get('EDGE_WEIGHT_TYPE', 'EUC_2D')
+    if metric != 'EXPLICIT':
+        metric_distances(metric, 0.0, 0.0, 0.0, 0.0)  # Raises for metrics the solver cannot measure
+        if coords is None:
+            raise ValueError(f"{path} has no NODE_COORD_SECTION")
+    elif weights is None:
+        raise ValueError(f"{path} has no EDGE_WEIGHT_SECTION")
+    if coords is None:
+        # No display data: lay the cities out on a circle
+        angles = 2 * np.pi * np.arange(len(weights)) / len(weights)
+        coords = np.vstack((np.cos(angles), np.sin(angles)))
+    try:
+        np.save(coords_path, coords)
+        if weights is not None:
+            np.save(weights_path, weights)
+    except OSError:
+        pass  # The cache is only an optimisation, e.g. for read-only directories
+    return TsplibInstance(header, coords, weights)
+
+def write_tour(path, tour, name, length=None):
+    # Write a tour (0-based city indices) as a TSPLIB .tour file with 1-based node ids
+    with open(path, 'w') as f:
+        f.write(f"NAME : {name}.tour\n")
+        if length is not None:
+            # Integer TSPLIB lengths are written in full so they compare with published optima
+            exact = f"{length:.0f}" if float(length).is_integer() else repr(float(length))
+            f.write(f"COMMENT : Length = {exact}\n")
+        f.write(f"TYPE : TOUR\nDIMENSION : {len(tour)}\nTOUR_SECTION\n")
+        f.writelines(f"{city + 1}\n" for city in tour)
+        f.write("-1\nEOF\n")
+
+class SpatialGrid:
+    # Uniform grid of cities for nearest-neighbour queries; cities can be removed and added back
+    def __init__(self, xs, ys, filled=True):
+        self.xs, self.ys = xs, ys
+        n = len(xs)
+        self.min_x, self.min_y = min(xs), min(ys)
+        size = max(max(xs) - self.min_x, max(ys) - self.min_y)
+        cells_per_side = max(1, int(math.sqrt(n / points_per_cell)))
+        self.cell = size / cells_per_side or 1.0
+        self.cols = int((max(xs) - self.min_x) / self.cell) + 1
+        self.rows = int((max(ys) - self.min_y) / self.cell) + 1
+        self.cells = [[] for _ in range(self.cols * self.rows)]
+        self.cell_of = [int((xs[i] - self.min_x) / self.cell) + int((ys[i] - self.min_y) / self.cell) * self.cols for i in range(n)]
+        self.slot = [0] * n  # Index of each city inside its cell list
+        self.count = 0
+        if filled:
+            for city in range(n):
+                self.add(city)
+
+    def add(self, city):
+        members = self.cells[self.cell_of[city]]
+        self.slot[city] = len(members)
+        members.append(city)
+        self.count += 1
+
+    def remove(self, city):
+        members = self.cells[self.cell_of[city]]
+        last = members.pop()
+        if last != city:
+            members[self.slot[city]] = last
+            self.slot[last] = self.slot[city]
+        self.count -= 1
+
+    def ring(self, cx, cy, r):
+        # Cities in the square ring of cells at Chebyshev distance r from cell (cx, cy)
+        cols, rows, cells = self.cols, self.rows, self.cells
+        for gy in range(max(0, cy - r), min(rows, cy + r + 1)):
+            if gy in (cy - r, cy + r):
+                x_range = range(max(0, cx - r), min(cols, cx + r + 1))
+            else:
+                x_range = [gx for gx in (cx - r, cx + r) if 0 <= gx < cols]
+            for gx in x_range:
+                yield from cells[gx + gy * cols]
+
+    def nearest(self, city):
+        # Nearest city still in the grid (other than city itself), or None when the grid is empty
+        xs, ys = self.xs, self.ys
+        x, y = xs[city], ys[city]
+        cx, cy = int((x - self.min_x) / self.cell), int((y - self.min_y) / self.cell)
+        best, best_distance = None, math.inf
+        for r in range(max(self.cols, self.rows)):
+            for other in self.ring(cx, cy, r):
+                if other != city:
+                    distance = math.hypot(xs[other] - x, ys[other] - y)
+                    if distance < best_distance:
+                        best, best_distance = other, distance
+            # Cities beyond ring r are at least r cells away
+            if best is not None and best_distance <= r * self.cell:
+                break
+        return best
+
+    def k_nearest(self, city, k):
+        # The k nearest cities in the grid, nearest first
+        xs, ys = self.xs, self.ys
+        x, y = xs[city], ys[city]
+        cx, cy = int((x - self.min_x) / self.cell), int((y - self.min_y) / self.cell)
+        found = []
+        for r in range(max(self.cols, self.rows)):
+            for other in self.ring(cx, cy, r):
+                if other != city:
+                    found.append((math.hypot(xs[other] - x, ys[other] - y), other))
+            if len(found) >= k:
+                found.sort()
+                if found[k - 1][0] <= r * self.cell:
+                    break
+        found.sort()
+        return [other for _, other in found[:k]]
+
+def nearest_neighbour_tour(xs, ys):
+    # Nearest neighbour tour from city 0, with the nearest unvisited city found through the spatial grid
+    grid = SpatialGrid(xs, ys)
+    tour = [0]
+    grid.remove(0)
+    while grid.count:
+        city = grid.nearest(tour[-1])
+        grid.remove(city)
+        tour.append(city)
+    return tour
+
+def matrix_nearest_neighbour_tour(distances):
+    # Nearest neighbour tour from city 0 read from the distance rows, for metrics without usable coordinates
+    n = len(distances)
+    visited = np.zeros(n, dtype=bool)
+    tour = [0]
+    visited[0] = True
+    for _ in range(n - 1):
+        row = distances.rows(tour[-1], tour[-1] + 1)[0]
+        row[visited] = np.inf
+        city = int(np.argmin(row))
+        visited[city] = True
+        tour.append(city)
+    return tour
+
+def greedy_edge_tour(xs, ys, neighbours):
+    # Greedy matching: take candidate edges shortest first while every city has degree <= 2 and no cycle closes,
+    # then join the resulting paths nearest endpoint first
+    n = len(xs)
+    edges = sorted((math.hypot(xs[a] - xs[b], ys[a] - ys[b]), a, b) for a in range(n) for b in neighbours[a] if a < b)
+    parent = list(range(n))
+
+    def find(city):
+        while parent[city] != city:
+            parent[city] = parent[parent[city]]
+            city = parent[city]
+        return city
+
+    adjacent = [[] for _ in range(n)]
+    for _, a, b in edges:
+        if len(adjacent[a]) < 2 and len(adjacent[b]) < 2:
+            root_a, root_b = find(a), find(b)
+            if root_a != root_b:
+                parent[root_a] = root_b
+                adjacent[a].append(b)
+                adjacent[b].append(a)
+
+    # Cities of degree 0 or 1 end a path; walk each path and jump to the nearest free endpoint
+    endpoints = SpatialGrid(xs, ys, filled=False)
+    for city in range(n):
+        if len(adjacent[city]) < 2:
+            endpoints.add(city)
+    tour = []
+    start = next(city for city in range(n) if len(adjacent[city]) < 2)
+    while start is not None:
+        endpoints.remove(start)
+        previous, city = None, start
+        while True:
+            tour.append(city)
+            following = [other for other in adjacent[city] if other != previous]
+            if not following:
+                break
+            previous, city = city, following[0]
+        if city != start:
+            endpoints.remove(city)
+        start = endpoints.nearest(city) if endpoints.count else None
+    return tour
+
+def hilbert_tour(xs, ys, order=16):
+    # Visit the cities in the order of their position along a Hilbert space-filling curve
+    xs, ys = np.asarray(xs, dtype=np.float64), np.asarray(ys, dtype=np.float64)
+    side = (1 << order) - 1
+    span = max(xs.max() - xs.min(), ys.max() - ys.min()) or 1.0
+    x = ((xs - xs.min()) / span * side).astype(np.int64)
+    y = ((ys - ys.min()) / span * side).astype(np.int64)
+    d = np.zeros(len(xs), dtype=np.int64)
+    s = 1 << (order - 1)
+    while s > 0:
+        rx = (x & s) > 0
+        ry = (y & s) > 0
+        d += s * s * ((3 * rx) ^ ry)
+        # Rotate the quadrant so the curve stays continuous
+        flip = ~ry & rx
+        x = np.where(flip, side - x, x)
+        y = np.where(flip, side - y, y)
+        x, y = np.where(~ry, y, x), np.where(~ry, x, y)
+        s >>= 1
+    return np.argsort(d, kind='stable').tolist()
+
+def insertion_tour(xs, ys):
+    # Insert the cities in random order next to their nearest already inserted city, on its cheaper side
+    n = len(xs)
+    order = list(range(n))
+    random.shuffle(order)
+    grid = SpatialGrid(xs, ys, filled=False)
+    succ, pred = [0] * n, [0] * n
+    first = order[0]
+    succ[first] = pred[first] = first
+    grid.add(first)
+
+    def dist(a, b):
+        return math.hypot(xs[a] - xs[b], ys[a] - ys[b])
+
+    for city in order[1:]:
+        near = grid.nearest(city)
+        after, before = succ[near], pred[near]
+        if dist(near, city) + dist(city, after) - dist(near, after) <= dist(before, city) + dist(city, near) - dist(before, near):
+            left, right = near, after
+        else:
+            left, right = before, near
+        succ[left], pred[city], succ[city], pred[right] = city, left, right, city
+        grid.add(city)
+
+    tour = [first]
+    while len(tour) < n:
+        tour.append(succ[tour[-1]])
+    return tour
+
+class Tour:
+    # Tour stored as an array of cities plus a city -> position index
     def __init__(self, cities):
+        self.order = array('i', cities)
+        self.pos = array('i', bytes(4 * len(self.order)))
+        for position, city in enumerate(self.order):
+            self.pos[city] = position
+
+    def __len__(self):
+        return len(self.order)
+
+    def __getitem__(self, position):
+        return self.order[position]
+
+    def __iter__(self):
+        return iter(self.order)
+
+    def tolist(self):
+        return self.order.tolist()
+
+    def next(self, city):
+        position = self.pos[city] + 1
+        return self.order[position if position < len(self.order) else 0]
+
+    def prev(self, city):
+        return self.order[self.pos[city] - 1]
+
+    def between(self, a, b, c):
+        # True if b is reached when walking forward from a to c (inclusive)
+        pa, pb, pc = self.pos[a], self.pos[b], self.pos[c]
+        if pa <= pc:
+            return pa <= pb <= pc
+        return pb >= pa or pb <= pc
+
+    def swap(self, i, j):
+        # Swap the cities at positions i and j
+        order, pos = self.order, self.pos
+        a, b = order[i], order[j]
+        order[i], order[j] = b, a
+        pos[a], pos[b] = j, i
+
+    def reverse_positions(self, i, j):
+        # Reverse exactly the positions i..j inclusive, walking forward from i (may wrap around)
+        order, pos, n = self.order, self.pos, len(self.order)
+        for _ in range(((j - i) % n + 1) // 2):
+            a, b = order[i], order[j]
+            order[i], order[j] = b, a
+            pos[a], pos[b] = j, i
+            i = i + 1 if i + 1 < n else 0
+            j = j - 1 if j > 0 else n - 1
+
+    def reverse(self, i, j):
+        # 2-opt reversal of positions i..j; reversing the other side instead gives the same cycle, so take the shorter one
+        n = len(self.order)
+        length = (j - i) % n + 1
+        if length == n:
+            return
+        if 2 * length > n:
+            i, j = (j + 1) % n, (i - 1) % n
+        self.reverse_positions(i, j)
+
+def one_tree(matrix, pi):
+    # Minimum 1-tree under the costs matrix[i, j] + pi[i] + pi[j]: a spanning tree on cities 1..n-1 (Prim)
+    # plus the two cheapest edges of city 0. Returns its cost and the degree of every city
+    n = len(matrix)
+    degree = np.zeros(n, dtype=np.int64)
+    in_tree = np.zeros(n, dtype=bool)
+    in_tree[:2] = True
+    key = matrix[1] + pi[1] + pi
+    key[in_tree] = np.inf
+    parent = np.ones(n, dtype=np.int64)
+    cost = 0.0
+    for _ in range(n - 2):
+        j = int(np.argmin(key))
+        cost += key[j]
+        degree[j] += 1
+        degree[parent[j]] += 1
+        in_tree[j] = True
+        key[j] = np.inf
+        candidate = matrix[j] + pi[j] + pi
+        closer = (candidate < key) & ~in_tree
+        key[closer] = candidate[closer]
+        parent[closer] = j
+    from_first = matrix[0, 1:] + pi[0] + pi[1:]
+    two = np.argpartition(from_first, 1)[:2]
+    cost += from_first[two].sum()
+    degree[0] = 2
+    degree[two + 1] += 1
+    return cost, degree
+
+def held_karp_bound(distances, upper_bound, iterations=None):
+    # Held-Karp lower bound: subgradient ascent on the city penalties pi of the minimum 1-tree
+    n = len(distances)
+    matrix = distances.rows(0, n)
+    np.fill_diagonal(matrix, np.inf)
+    pi = np.zeros(n)
+    best = -np.inf
+    step_scale = 2.0
+    stalled = 0
+    for _ in range(iterations or held_karp_iterations):
+        cost, degree = one_tree(matrix, pi)
+        bound = cost - 2 * pi.sum()
+        if bound > best + 1e-9:
+            best, stalled = bound, 0
+        else:
+            stalled += 1
+            if stalled >= 5:
+                step_scale, stalled = step_scale / 2, 0
+        subgradient = degree - 2
+        norm = (subgradient * subgradient).sum()
+        if norm == 0:
+            break  # The 1-tree is a tour, so it is optimal
+        pi += step_scale * max(upper_bound - bound, 0) / norm * subgradient
+    if distances.metric not in ('euclidean', 'explicit'):
+        best = math.ceil(best - 1e-6)  # TSPLIB metrics give integer tour lengths
+    return best
+
+def exact_tour(distances):
+    # Optimal tour by the Held-Karp bitmask DP, one layer of subsets (by size) at a time; cities 1..n-1 are bits 0..n-2
+    n = len(distances)
+    if n <= 3:
+        tour = list(range(n))
+        return sum(distances[tour[i]][tour[(i + 1) % n]] for i in range(n)) if n > 1 else 0, tour
+    matrix = distances.rows(0, n)
+    m = n - 1
+    masks = np.arange(1 << m)
+    sizes = np.zeros(1 << m, dtype=np.int64)
+    for bit in range(m):
+        sizes += (masks >> bit) & 1
+    cost = np.full((1 << m, m), np.inf)
+    cost[1 << np.arange(m), np.arange(m)] = matrix[0, 1:]
+    step = matrix[1:, 1:]
+    for size in range(2, m + 1):
+        layer = masks[sizes == size]
+        for j in range(m):
+            ending = layer[(layer >> j) & 1 == 1]
+            cost[ending, j] = (cost[ending ^ (1 << j)] + step[:, j]).min(axis=1)
+    full = (1 << m) - 1
+    closing = cost[full] + matrix[1:, 0]
+    j = int(np.argmin(closing))
+    length = float(closing[j])
+    # Walk back through the table
+    tour = []
+    mask = full
+    while mask:
+        tour.append(j + 1)
+        previous = mask ^ (1 << j)
+        if previous:
+            j = int(np.argmin(cost[previous] + step[:, j]))
+        mask = previous
+    tour.append(0)
+    return length, tour[::-1]
+
+def tour_lower_bound(distances, upper_bound):
+    # The best affordable lower bound on the optimal tour length: exact for tiny instances, Held-Karp for
+    # moderate ones, None beyond held_karp_city_limit
+    n = len(distances)
+    if n <= exact_bound_limit:
+        return exact_tour(distances)[0]
+    if n <= held_karp_city_limit:
+        return held_karp_bound(distances, upper_bound)
+    return None
+
+def optimality_gap(length, bound):
+    # Relative excess of a tour length over a lower bound, or None without a usable bound
+    if bound is None or bound <= 0:
+        return None
+    return (length - bound) / bound
+
+def within_gap(gap):
+    return gap is not None and gap <= gap_threshold
+
+class TSP_Solver:
+    def __init__(self, cities, distances=None):
         self.cities = cities
         self.num_cities = len(cities)
-        # Precompute the distances between every pair of cities
-        self.distance_matrix = self.calculate_distance_matrix()
+        # Precompute the distances between every pair of cities, unless given a backend with its own metric
+        self.distance_matrix = distances if distances is not None else self.calculate_distance_matrix()
+        self.neighbours = None  # Candidate neighbour lists for the local search, built on first use
         # Generate an initial solution using the greedy approach
-        self.current_solution = self.greedy_initial_solution()
-        self.best_solution = self.current_solution[:]
+        self.current_solution = Tour(self.greedy_initial_solution())
+        self._best_solution = self.current_solution.tolist()
+        self.best_is_current = False  # True while the best tour is the current one and has not been copied yet
         # Calculate the distance of the initial solution
-        self.best_distance = self.calculate_total_distance(self.best_solution)
+        self.best_distance = self.calculate_total_distance(self._best_solution)
+        self.current_distance = self.best_distance  # Length of current_solution, kept up to date move by move
         self.temperature = 10000  # Initial temperature for simulated annealing
         self.cooling_rate = 0.999  # Cooling rate to control the annealing process
         self.original_distance = self.best_distance  # Store the original distance of the initial solution
+        self._lower_bound = None
+        self.bound_computed = False  # The lower bound is only computed when a gap is first asked for
+
+    @property
+    def best_solution(self):
+        self.snapshot_best()
+        return self._best_solution
+
+    def snapshot_best(self):
+        # Copy the current tour into the best tour if it was recorded as best but not copied yet
+        if self.best_is_current:
+            self._best_solution = self.current_solution.tolist()
+            self.best_is_current = False
 
     def calculate_distance_matrix(self):
-        # Create a matrix to store distances between each pair of cities
-        matrix = [[0]*self.num_cities for _ in range(self.num_cities)]
-        for i in range(self.num_cities):
-            for j in range(i+1, self.num_cities):
-                dist = math.hypot(
-                    self.cities[i].x - self.cities[j].x,
-                    self.cities[i].y - self.cities[j].y
-                )
-                matrix[i][j] = dist
-                matrix[j][i] = dist
-        return matrix
+        # Distances between each pair of cities, stored or computed on demand depending on distance_backend
+        return make_distances([city.x for city in self.cities], [city.y for city in self.cities])
 
     def calculate_total_distance(self, solution):
         # Calculate the total distance of the given solution (route)
@@ -86,31 +810,62 @@ class TSP_Solver:
             distance += self.distance_matrix[a][b]
         return distance
 
-    def swap_cities(self, solution):
-        # Swap two cities in the solution to create a new solution
-        new_solution = solution[:]
-        i, j = random.sample(range(self.num_cities), 2)
-        new_solution[i], new_solution[j] = new_solution[j], new_solution[i]
-        return new_solution
+    def swap_delta(self, solution, i, j):
+        # Change in tour length from swapping the cities at positions i and j, using only the affected edges
+        n = len(solution)
+        if n <= 3:
+            return 0  # Every ordering of three cities has the same length
+        if i > j:
+            i, j = j, i
+        d = self.distance_matrix
+        a, b = solution[i], solution[j]
+        if j == i + 1:
+            # Neighbours: prev - a - b - next becomes prev - b - a - next
+            prev, nxt = solution[i - 1], solution[(j + 1) % n]
+            return d[prev][b] + d[a][nxt] - d[prev][a] - d[b][nxt]
+        if i == 0 and j == n - 1:
+            # Neighbours across the wrap-around: prev - b - a - next becomes prev - a - b - next
+            prev, nxt = solution[j - 1], solution[i + 1]
+            return d[prev][a] + d[b][nxt] - d[prev][b] - d[a][nxt]
+        prev_a, next_a = solution[i - 1], solution[i + 1]
+        prev_b, next_b = solution[j - 1], solution[(j + 1) % n]
+        removed = d[prev_a][a] + d[a][next_a] + d[prev_b][b] + d[b][next_b]
+        added = d[prev_a][b] + d[b][next_a] + d[prev_b][a] + d[a][next_b]
+        return added - removed
 
     def anneal(self):
         # Perform one iteration of the simulated annealing process
-        new_solution = self.swap_cities(self.current_solution)
-        current_distance = self.calculate_total_distance(self.current_solution)
-        new_distance = self.calculate_total_distance(new_solution)
+        i, j = random.sample(range(self.num_cities), 2)
+        new_distance = self.current_distance + self.swap_delta(self.current_solution, i, j)
         # Calculate the probability of accepting the new solution
-        acceptance_prob = self.acceptance_probability(current_distance, new_distance, self.temperature)
+        acceptance_prob = self.acceptance_probability(self.current_distance, new_distance, self.temperature)
         if acceptance_prob > random.random():
-            # Accept the new solution
-            self.current_solution = new_solution
-            current_distance = new_distance
-            # Update the best solution if the new solution is better
-            if current_distance < self.best_distance:
-                self.best_distance = current_distance
-                self.best_solution = self.current_solution[:]
+            # Update the best solution if the new solution is better; it is only copied once the search moves away from it
+            if new_distance < self.best_distance:
+                self.best_distance = new_distance
+                self.best_is_current = True
+            else:
+                self.snapshot_best()
+            # Accept the new solution by swapping the two cities in place
+            self.current_solution.swap(i, j)
+            self.current_distance = new_distance
         # Decrease the temperature (cooling step)
         self.temperature *= self.cooling_rate
 
+    @property
+    def lower_bound(self):
+        if not self.bound_computed:
+            self._lower_bound = tour_lower_bound(self.distance_matrix, self.best_distance)
+            self.bound_computed = True
+        return self._lower_bound
+
+    def gap(self):
+        return optimality_gap(self.best_distance, self.lower_bound)
+
+    def is_finished(self):
+        # Cooled down, or the best tour is already provably good enough
+        return self.temperature <= 1 or within_gap(self.gap())
+
     def acceptance_probability(self, current_distance, new_distance, temperature):
         # Calculate the acceptance probability for the new solution
         if new_distance < current_distance:
@@ -120,16 +875,367 @@ class TSP_Solver:
             return math.exp((current_distance - new_distance) / temperature)
 
     def greedy_initial_solution(self):
-        # Generate a greedy initial solution using the nearest neighbor heuristic
-        unvisited = list(range(self.num_cities))
-        solution = [unvisited.pop(0)]  # Start from the first city
-        while unvisited:
-            last = solution[-1]
-            # Select the nearest unvisited city
-            next_city = min(unvisited, key=lambda city: self.distance_matrix[last][city])
-            solution.append(next_city)
-            unvisited.remove(next_city)
-        return solution
+        # Generate an initial solution with the construction heuristic selected by `construction`
+        if self.num_cities < 3:
+            return list(range(self.num_cities))
+        if self.distance_matrix.metric == 'explicit':
+            return matrix_nearest_neighbour_tour(self.distance_matrix)  # Coordinates are only for display
+        xs, ys = self.distance_matrix.xs.tolist(), self.distance_matrix.ys.tolist()
+        builders = {
+            'nearest': lambda: nearest_neighbour_tour(xs, ys),
+            'greedy': lambda: greedy_edge_tour(xs, ys, self.neighbour_lists()),
+            'hilbert': lambda: hilbert_tour(xs, ys),
+            'insertion': lambda: insertion_tour(xs, ys),
+        }
+        if construction != 'best':
+            return builders[construction]()
+        return min((build() for build in builders.values()), key=self.calculate_total_distance)
+
+    def neighbour_lists(self):
+        # The neighbour_count nearest cities of every city, nearest first (computed once)
+        if self.neighbours is None:
+            self.neighbours = self.distance_matrix.nearest(neighbour_count)
+        return self.neighbours
+
+    def local_search(self, solution):
+        # Improve a tour with 2-opt and Or-opt moves restricted to the candidate neighbour lists
+        search = LocalSearch(self.distance_matrix, solution, self.neighbour_lists())
+        search.optimize()
+        return search.tour, search.length
+
+    def improve_with_local_search(self, solution):
+        # Run the local search from solution and keep the result as the current (and possibly best) tour
+        tour, length = self.local_search(solution)
+        self.snapshot_best()
+        self.current_solution = tour
+        self.current_distance = length
+        if length < self.best_distance:
+            self.best_distance = length
+            self.best_is_current = True
+
+class LocalSearch:
+    # 2-opt and Or-opt local search over a Tour, with neighbour lists and don't-look bits
+    def __init__(self, distance_matrix, solution, neighbours):
+        self.d = distance_matrix
+        self.tour = Tour(solution)
+        self.n = len(self.tour)
+        self.pos = self.tour.pos
+        self.neighbours = neighbours
+        self.length = sum(self.d[self.tour[i - 1]][self.tour[i]] for i in range(self.n))
+        self.epsilon = 1e-9
+
+    def move_segment(self, s1, s2, left, right, reverse_segment):
+        # Move the segment s1..s2 between the adjacent cities left and right, rotating whichever side is shorter
+        n, pos, tour = self.n, self.pos, self.tour
+        i, j = pos[s1], pos[s2]
+        if (pos[left] - j) % n <= (i - pos[right]) % n:
+            # [segment][j+1 .. left] becomes [j+1 .. left][segment]
+            start, end = i, pos[left]
+            if not reverse_segment:
+                tour.reverse_positions(i, j)
+            tour.reverse_positions((j + 1) % n, end)
+        else:
+            # [right .. i-1][segment] becomes [segment][right .. i-1]
+            start, end = pos[right], j
+            tour.reverse_positions(start, (i - 1) % n)
+            if not reverse_segment:
+                tour.reverse_positions(i, j)
+        tour.reverse_positions(start, end)
+
+    def try_two_opt(self, a):
+        d = self.d
+        tour = self.tour
+        # Replace edges (a, succ a) and (c, succ c) with (a, c) and (succ a, succ c)
+        b = tour.next(a)
+        for c in self.neighbours[a]:
+            if d[a][c] >= d[a][b]:
+                break
+            c_next = tour.next(c)
+            if c == b or c_next == a:
+                continue
+            delta = d[a][c] + d[b][c_next] - d[a][b] - d[c][c_next]
+            if delta < -self.epsilon:
+                tour.reverse(self.pos[b], self.pos[c])
+                self.length += delta
+                return a, b, c, c_next
+        # Replace edges (pred a, a) and (pred c, c) with (a, c) and (pred a, pred c)
+        p = tour.prev(a)
+        for c in self.neighbours[a]:
+            if d[a][c] >= d[p][a]:
+                break
+            c_prev = tour.prev(c)
+            if c == p or c_prev == a:
+                continue
+            delta = d[a][c] + d[p][c_prev] - d[p][a] - d[c_prev][c]
+            if delta < -self.epsilon:
+                tour.reverse(self.pos[a], self.pos[c_prev])
+                self.length += delta
+                return a, p, c, c_prev
+        return None
+
+    def try_or_opt(self, a):
+        d, n, tour = self.d, self.n, self.tour
+        # Move the segment of 1 to 3 cities starting at a next to a neighbour of one of its ends
+        for length in range(1, 4):
+            if length >= n - 2:
+                break
+            s1, s2 = a, self.tour[(self.pos[a] + length - 1) % n]
+            p, nx = tour.prev(s1), tour.next(s2)
+            removed = d[p][s1] + d[s2][nx] - d[p][nx]
+            for end in (s1, s2):
+                other = s2 if end == s1 else s1
+                for c in self.neighbours[end]:
+                    if d[end][c] >= removed:
+                        break
+                    if (self.pos[c] - self.pos[s1]) % n < length:
+                        continue
+                    for e in (tour.next(c), tour.prev(c)):
+                        if (self.pos[e] - self.pos[s1]) % n < length:
+                            continue
+                        delta = d[c][end] + d[other][e] - d[c][e] - removed
+                        if delta < -self.epsilon:
+                            # Orient the insertion point along the tour: left -> segment -> right
+                            if e == tour.next(c):
+                                left, right, reverse_segment = c, e, end == s2
+                            else:
+                                left, right, reverse_segment = e, c, end == s1
+                            self.move_segment(s1, s2, left, right, reverse_segment)
+                            self.length += delta
+                            return p, nx, s1, s2, c, e
+        return None
+
+    def optimize(self):
+        # Process cities until none has an improving move; only cities next to changed edges are looked at again
+        queue = deque(self.tour)
+        queued = [True] * self.n
+        while queue:
+            city = queue.popleft()
+            queued[city] = False
+            touched = self.try_two_opt(city) or self.try_or_opt(city)
+            if touched:
+                for other in touched:
+                    if not queued[other]:
+                        queued[other] = True
+                        queue.append(other)
+        return self.tour
+
+def tempering_worker(connection, cities, seed, distances=None):
+    # Process body of one replica: anneal at the temperature it is given and report its energy and any new best tour
+    random.seed(seed)
+    solver = TSP_Solver(cities, distances)
+    solver.cooling_rate = 1.0
+    reported = math.inf
+    while True:
+        message = connection.recv()
+        if message is None:
+            break
+        solver.temperature, steps = message
+        for _ in range(steps):
+            solver.anneal()
+        best = solver.best_solution if solver.best_distance < reported else None
+        reported = min(reported, solver.best_distance)
+        connection.send((solver.current_distance, solver.best_distance, best))
+    connection.close()
+
+class ParallelTempering:
+    # Replicas annealing at a geometric ladder of fixed temperatures in separate processes;
+    # neighbouring rungs exchange temperatures with the replica-exchange Metropolis rule
+    def __init__(self, cities, distances=None):
+        self.solver = TSP_Solver(cities, distances)  # Coordinator copy for the initial tour and local search
+        self.best_solution = self.solver.best_solution
+        self.best_distance = self.solver.best_distance
+        self.current_solution = self.best_solution
+        self.current_distance = self.best_distance
+        replicas = max(2, tempering_replicas)
+        ratio = (tempering_max_temperature / tempering_min_temperature) ** (1 / (replicas - 1))
+        self.temperatures = [tempering_min_temperature * ratio ** k for k in range(replicas)]
+        self.rung_replica = list(range(replicas))  # Replica currently at each rung, coldest first
+        self.energies = [self.best_distance] * replicas
+        self.rounds = 0
+        self.exchanges = 0
+        self.connections = []
+        self.processes = []
+        for _ in range(replicas):
+            parent_connection, child_connection = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=tempering_worker, daemon=True,
+                                              args=(child_connection, cities, random.getrandbits(64), distances))
+            process.start()
+            child_connection.close()
+            self.connections.append(parent_connection)
+            self.processes.append(process)
+
+    def gap(self):
+        return optimality_gap(self.best_distance, self.solver.lower_bound)
+
+    def is_finished(self):
+        return self.rounds >= tempering_rounds or within_gap(self.gap())
+
+    def anneal(self):
+        # One round: every replica anneals in parallel, then neighbouring rungs try to exchange
+        for rung, replica in enumerate(self.rung_replica):
+            self.connections[replica].send((self.temperatures[rung], tempering_steps))
+        for replica, connection in enumerate(self.connections):
+            energy, best_distance, best = connection.recv()
+            self.energies[replica] = energy
+            if best is not None and best_distance < self.best_distance:
+                self.best_distance, self.best_solution = best_distance, best
+        self.current_solution, self.current_distance = self.best_solution, self.best_distance
+
+        # Alternate between even and odd rung pairs
+        for rung in range(self.rounds % 2, len(self.temperatures) - 1, 2):
+            cold, hot = self.rung_replica[rung], self.rung_replica[rung + 1]
+            exponent = (self.energies[cold] - self.energies[hot]) * (1 / self.temperatures[rung] - 1 / self.temperatures[rung + 1])
+            if exponent >= 0 or random.random() < math.exp(exponent):
+                self.rung_replica[rung], self.rung_replica[rung + 1] = hot, cold
+                self.exchanges += 1
+        self.rounds += 1
+
+    def improve_with_local_search(self, solution):
+        tour, length = self.solver.local_search(solution)
+        if length < self.best_distance:
+            self.best_distance, self.best_solution = length, tour.tolist()
+        self.current_solution, self.current_distance = self.best_solution, self.best_distance
+
+    def close(self):
+        for connection in self.connections:
+            connection.send(None)
+            connection.close()
+        for process in self.processes:
+            process.join()
+        self.connections = []
+        self.processes = []
+
+def construct_ant_tours(distances, candidates, weights, ants, rng):
+    # Build one tour per ant, all ants advancing a city at a time; each ant picks among the unvisited
+    # candidates of its city in proportion to weights, or takes the nearest unvisited city once none is left
+    n, k = candidates.shape
+    tours = np.empty((ants, n), dtype=np.int64)
+    visited = np.zeros((ants, n), dtype=bool)
+    ant_rows = np.arange(ants)
+    current = rng.integers(n, size=ants)
+    tours[:, 0] = current
+    visited[ant_rows, current] = True
+    for step in range(1, n):
+        options = candidates[current]
+        cumulative = np.cumsum(weights[current] * ~visited[ant_rows[:, np.newaxis], options], axis=1)
+        totals = cumulative[:, -1]
+        picks = (cumulative <= (rng.random(ants) * totals)[:, np.newaxis]).sum(axis=1)
+        following = options[ant_rows, np.minimum(picks, k - 1)]
+        for ant in np.flatnonzero(totals <= 0):
+            row = distances.rows(current[ant], current[ant] + 1)[0]
+            row[visited[ant]] = np.inf
+            following[ant] = np.argmin(row)
+        tours[:, step] = following
+        visited[ant_rows, following] = True
+        current = following
+    return tours
+
+ant_worker_state = {}  # Distances and candidate lists of the colony, set once per worker process
+
+def ant_worker_init(distances, candidates):
+    ant_worker_state['distances'] = distances
+    ant_worker_state['candidates'] = candidates
+
+def ant_worker_construct(task):
+    weights, ants, seed = task
+    return construct_ant_tours(ant_worker_state['distances'], ant_worker_state['candidates'],
+                               weights, ants, np.random.default_rng(seed))
+
+class AntColonySolver:
+    # Ant System / MAX-MIN Ant System on the distance matrix of a TSP_Solver; pheromone and heuristic
+    # values are kept only for the candidate edges, as (cities x candidates) NumPy arrays
+    def __init__(self, cities, distances=None):
+        self.solver = TSP_Solver(cities, distances)  # Distances, initial tour and local search
+        self.distance_matrix = self.solver.distance_matrix
+        self.num_cities = self.solver.num_cities
+        self.best_solution = self.solver.best_solution
+        self.best_distance = self.solver.best_distance
+        self.current_solution = self.best_solution
+        self.current_distance = self.best_distance
+        self.iteration = 0
+        self.rng = np.random.default_rng(random.getrandbits(64))
+        self.pool = None
+        if self.num_cities < 3:
+            return
+        self.candidates = np.array(self.distance_matrix.nearest(aco_candidate_count), dtype=np.int64)
+        lengths = self.distance_matrix.edge_lengths(np.arange(self.num_cities)[:, np.newaxis], self.candidates)
+        self.heuristic = np.maximum(lengths, 1e-9) ** -aco_beta
+        if aco_variant == 'mmas':
+            self.pheromone = np.full(self.candidates.shape, self.pheromone_limits()[1])
+        else:
+            self.pheromone = np.full(self.candidates.shape, aco_ants / self.best_distance)
+        if aco_workers > 1:
+            self.pool = multiprocessing.Pool(aco_workers, ant_worker_init, (self.distance_matrix, self.candidates))
+
+    def pheromone_limits(self):
+        # MAX-MIN bounds derived from the best tour so far
+        upper = 1 / (aco_evaporation * self.best_distance)
+        return upper / (2 * self.num_cities), upper
+
+    def gap(self):
+        return optimality_gap(self.best_distance, self.solver.lower_bound)
+
+    def is_finished(self):
+        return self.num_cities < 3 or self.iteration >= aco_iterations or within_gap(self.gap())
+
+    def construct(self, weights):
+        if self.pool is None:
+            return construct_ant_tours(self.distance_matrix, self.candidates, weights, aco_ants, self.rng)
+        shares = [len(share) for share in np.array_split(np.arange(aco_ants), aco_workers) if len(share)]
+        tasks = [(weights, ants, seed) for ants, seed in zip(shares, self.rng.integers(2 ** 63, size=len(shares)).tolist())]
+        return np.concatenate(self.pool.map(ant_worker_construct, tasks))
+
+    def deposit(self, tours, amounts):
+        # Add each tour's amount to the pheromone of its edges, in both directions, where the edge is a candidate
+        a = tours.ravel()
+        b = np.roll(tours, -1, axis=1).ravel()
+        amounts = np.repeat(amounts, tours.shape[1])
+        for source, target in ((a, b), (b, a)):
+            edges, slots = np.nonzero(self.candidates[source] == target[:, np.newaxis])
+            np.add.at(self.pheromone, (source[edges], slots), amounts[edges])
+
+    def anneal(self):
+        # One colony iteration (named like TSP_Solver.anneal so UI.run_solver drives either)
+        tours = self.construct(self.pheromone ** aco_alpha * self.heuristic)
+        lengths = self.distance_matrix.edge_lengths(tours, np.roll(tours, -1, axis=1)).sum(axis=1)
+        best = int(np.argmin(lengths))
+        self.current_solution = tours[best].tolist()
+        self.current_distance = self.solver.calculate_total_distance(self.current_solution)
+        if self.current_distance < self.best_distance:
+            self.best_solution, self.best_distance = self.current_solution, self.current_distance
+
+        # Evaporate everywhere at once, then deposit in bulk
+        self.pheromone *= 1 - aco_evaporation
+        if aco_variant == 'mmas':
+            # Alternate the iteration-best and best-so-far tour as the only depositing ant
+            if self.iteration % 2:
+                self.deposit(np.array([self.best_solution]), np.array([1 / self.best_distance]))
+            else:
+                self.deposit(tours[best:best + 1], 1 / lengths[best:best + 1])
+            np.clip(self.pheromone, *self.pheromone_limits(), out=self.pheromone)
+        else:
+            self.deposit(tours, 1 / lengths)
+        self.iteration += 1
+
+    def pheromone_edges(self):
+        # Candidate edges whose pheromone is at least aco_shading_threshold of the strongest, with that fraction
+        if self.num_cities < 3:
+            return []
+        strength = self.pheromone / self.pheromone.max()
+        sources, slots = np.nonzero(strength >= aco_shading_threshold)
+        return list(zip(sources.tolist(), self.candidates[sources, slots].tolist(), strength[sources, slots].tolist()))
+
+    def improve_with_local_search(self, solution):
+        tour, length = self.solver.local_search(solution)
+        if length < self.best_distance:
+            self.best_distance, self.best_solution = length, tour.tolist()
+        self.current_solution, self.current_distance = self.best_solution, self.best_distance
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
 
 class UI(tk.Tk):
     def __init__(self):
@@ -148,8 +1254,12 @@ class UI(tk.Tk):
         self.h = self.height - padding * 2
 
         self.cities_list = []
+        self.instance = None  # TSPLIB instance the cities were loaded from, if any
+        self.distances = None  # Its distance backend; generated cities are measured on screen
         self.tsp_solver = None
         self.is_running = False
+        self.frame_job = None  # Pending after() callback of the running solver
+        self.clear_canvas()  # Also sets up the bookkeeping of drawn items
 
         # Menu bar setup
         menu_bar = Menu(self)
@@ -159,16 +1269,63 @@ class UI(tk.Tk):
 
         # Add menu options to generate cities and run the solver
         menu_TS.add_command(label="Generate", command=self.generate, underline=0)
+        menu_TS.add_command(label="Open TSPLIB...", command=self.open_instance, underline=0)
+        menu_TS.add_command(label="Save Tour...", command=self.save_tour, underline=0)
         menu_TS.add_command(label="Run", command=self.start_solver, underline=0)
+        menu_TS.add_command(label="Run Local Search", command=self.start_local_search, underline=4)
+        menu_TS.add_command(label="Run Parallel Tempering", command=self.start_parallel_tempering, underline=4)
+        menu_TS.add_command(label="Run Ant Colony", command=self.start_ant_colony, underline=4)
 
     def generate(self):
         # Generate random cities and draw them on the canvas
+        self.stop_solver()
         self.clear_canvas()
         self.cities_list.clear()
+        self.instance = None
+        self.distances = None
         for i in range(num_cities):
             self.add_city(i)
         self.draw_cities()
 
+    def open_instance(self):
+        # Load a TSPLIB .tsp file chosen by the user
+        path = filedialog.askopenfilename(filetypes=[('TSPLIB instances', '*.tsp'), ('All files', '*')])
+        if not path:
+            return
+        try:
+            instance = read_tsplib(path)
+        except (OSError, ValueError, KeyError, StopIteration) as error:
+            print(f"Could not read {path}: {error!r}")
+            return
+        self.load_instance(instance)
+
+    def load_instance(self, instance):
+        # Show an instance scaled to the canvas; the solvers measure it with its own metric
+        self.stop_solver()
+        self.clear_canvas()
+        self.cities_list.clear()
+        self.instance = instance
+        self.distances = instance.distances()
+        xs, ys = instance.display_coords()
+        span = max(np.ptp(xs), np.ptp(ys))
+        scale = min(self.w - padding, self.h - padding) / span if span else 1
+        screen_xs = (padding + (xs - xs.min()) * scale).tolist()
+        screen_ys = (padding + (ys.max() - ys) * scale).tolist()  # Screen y grows downwards
+        for i, (x, y) in enumerate(zip(screen_xs, screen_ys)):
+            self.cities_list.append(Node(x, y, i))
+        self.draw_cities()
+        print(f"Loaded {instance.name}: {len(instance)} cities, {instance.metric} distances")
+
+    def save_tour(self):
+        # Write the best tour found so far as a TSPLIB .tour file
+        if self.tsp_solver is None:
+            return
+        path = filedialog.asksaveasfilename(defaultextension='.tour', filetypes=[('TSPLIB tours', '*.tour')])
+        if not path:
+            return
+        name = self.instance.name if self.instance is not None else 'random'
+        write_tour(path, self.tsp_solver.best_solution, name, self.tsp_solver.best_distance)
+
     def add_city(self, index):
         # Add a new city at a random position within the canvas bounds
         x = random.randint(padding, self.w)
@@ -177,73 +1334,169 @@ class UI(tk.Tk):
         self.cities_list.append(node)
 
     def draw_cities(self):
-        # Draw all cities on the canvas
-        for city in self.cities_list:
-            city.draw(self.canvas)
+        # Draw all cities on the canvas once; later frames only recolour them
+        self.city_items = [city.draw(self.canvas) for city in self.cities_list]
+        self.city_color = 'yellow'
+        self.city_coords = np.array([(city.x, city.y) for city in self.cities_list], dtype=np.float64).reshape(-1, 2)
 
     def clear_canvas(self):
-        # Clear the canvas
+        # Clear the canvas and forget the items drawn on it
         self.canvas.delete("all")
+        self.city_items = []
+        self.city_color = None
+        self.tour_line = None
+        self.shown_distance = None
+        self.pheromone_lines = []
+        self.pheromone_shown = 0
+        self.text_items = {}
+
+    def stop_solver(self):
+        # Cancel the pending frame of the current solver, release its worker processes and forget it
+        if self.frame_job is not None:
+            self.after_cancel(self.frame_job)
+            self.frame_job = None
+        if isinstance(self.tsp_solver, (ParallelTempering, AntColonySolver)):
+            self.tsp_solver.close()
+        self.tsp_solver = None
+        self.is_running = False
+
+    def launch(self, solver):
+        # Show a fresh solver's progress on the cities already drawn
+        self.stop_solver()
+        self.tsp_solver = solver
+        self.draw_pheromone([])
+        self.hide_text('best')
+        self.shown_distance = None
+        self.is_running = True
+        self.run_solver(solver)
 
     def start_solver(self):
         # Start the TSP solver
         if not self.cities_list:
             self.generate()  # Generate cities if not already generated
-        self.tsp_solver = TSP_Solver(self.cities_list)
-        self.is_running = True
-        self.run_solver()
-
-    def run_solver(self):
-        # Run the solver iteratively using simulated annealing
-        if self.is_running and self.tsp_solver.temperature > 1:
-            self.tsp_solver.anneal()
-            # Clear and redraw the current solution to visualize progress
-            self.clear_canvas()
-            self.draw_solution(self.tsp_solver.current_solution)
+        self.launch(TSP_Solver(self.cities_list, self.distances))
+
+    def start_parallel_tempering(self):
+        # Start replicas at a ladder of temperatures on every core
+        if not self.cities_list:
+            self.generate()
+        self.launch(ParallelTempering(self.cities_list, self.distances))
+
+    def start_ant_colony(self):
+        # Start the ant colony, drawing the pheromone trails under the iteration-best tour
+        if not self.cities_list:
+            self.generate()
+        self.launch(AntColonySolver(self.cities_list, self.distances))
+
+    def start_local_search(self):
+        # Build a greedy tour and improve it with 2-opt / Or-opt local search only
+        if not self.cities_list:
+            self.generate()
+        self.stop_solver()
+        self.tsp_solver = TSP_Solver(self.cities_list, self.distances)
+        self.tsp_solver.improve_with_local_search(self.tsp_solver.current_solution)
+        print(f"Local search distance: {self.tsp_solver.best_distance}")
+        self.draw_pheromone([])
+        self.hide_text('current')
+        self.draw_solution(self.tsp_solver.best_solution)
+        self.display_best_distance()
+
+    def run_solver(self, solver):
+        # Run the solver for one frame's worth of time, then update what changed on the canvas
+        self.frame_job = None
+        if solver is not self.tsp_solver:
+            return  # Superseded by another solver or by new cities
+        if self.is_running and not self.tsp_solver.is_finished():
+            deadline = time.perf_counter() + 1 / frame_rate
+            while True:
+                self.tsp_solver.anneal()
+                if self.tsp_solver.is_finished() or time.perf_counter() >= deadline:
+                    break
+            if isinstance(self.tsp_solver, AntColonySolver):
+                self.draw_pheromone(self.tsp_solver.pheromone_edges())
+            self.draw_solution(self.tsp_solver.current_solution, self.tsp_solver.current_distance)
             self.display_current_distance()
-            self.canvas.update()
-            # Schedule the next iteration
-            self.after(1, self.run_solver)
+            self.update_idletasks()  # Paint this frame before the solver takes the next one
+            # Schedule the next frame
+            self.frame_job = self.after(1, self.run_solver, solver)
         else:
             # Stop the solver and display the best solution found
             self.is_running = False
-            print(f"Best distance found: {self.tsp_solver.best_distance}")
-            self.clear_canvas()
+            if isinstance(self.tsp_solver, (ParallelTempering, AntColonySolver)):
+                self.tsp_solver.close()
+            print(f"Best distance found: {self.tsp_solver.best_distance} (gap {self.format_gap()})")
+            if post_optimize:
+                self.tsp_solver.improve_with_local_search(self.tsp_solver.best_solution)
+                print(f"After local search: {self.tsp_solver.best_distance}")
+            self.draw_pheromone([])
+            self.hide_text('current')
             self.draw_solution(self.tsp_solver.best_solution)
             self.display_best_distance()
 
+    def show_text(self, name, y, text, color):
+        # Create a status line the first time, afterwards only change its text
+        item = self.text_items.get(name)
+        if item is None:
+            self.text_items[name] = self.canvas.create_text(
+                padding, y,
+                text=text,
+                font=('Arial', 20, 'bold'),
+                fill=color,
+                anchor='nw'
+            )
+        else:
+            self.canvas.itemconfig(item, text=text, state='normal')
+
+    def hide_text(self, name):
+        if name in self.text_items:
+            self.canvas.itemconfig(self.text_items[name], state='hidden')
+
     def display_best_distance(self):
-        # Add a message to display the best distance found
-        self.canvas.create_text(
-            padding, padding,
-            text=f"Best Distance Found: {int(self.tsp_solver.best_distance)}",
-            font=('Arial', 20, 'bold'),
-            fill='green',
-            anchor='nw'
-        )
+        # Display the best distance found
+        self.show_text('best', padding, f"Best Distance Found: {int(self.tsp_solver.best_distance)}   Gap: {self.format_gap()}", 'green')
         print(f"Best Distance Found: {int(self.tsp_solver.best_distance)}")
 
     def display_current_distance(self):
         # Display the current distance of the solution
-        current_distance = self.tsp_solver.calculate_total_distance(self.tsp_solver.current_solution)
-        self.canvas.create_text(
-            padding, padding + 50,
-            text=f"Current Distance: {int(current_distance)}",
-            font=('Arial', 20, 'bold'),
-            fill='orange',
-            anchor='nw'
-        )
+        self.show_text('current', padding + 50, f"Current Distance: {int(self.tsp_solver.current_distance)}   Gap: {self.format_gap()}", 'orange')
 
-    def draw_solution(self, solution):
-        # Draw the path
-        for i in range(len(solution)):
-            city_a = self.cities_list[solution[i]]
-            city_b = self.cities_list[solution[(i + 1) % len(solution)]]
-            edge = Edge(city_a, city_b)
-            edge.draw(self.canvas, color='red')  # Solid lines for the solution path
-        # Draw the cities
-        for city in self.cities_list:
-            city.draw(self.canvas, color='blue')
+    def format_gap(self):
+        # Optimality gap of the best tour so far, against the solver's lower bound
+        gap = self.tsp_solver.gap()
+        return 'unknown' if gap is None else f"{max(gap, 0):.2%}"
+
+    def draw_pheromone(self, edges):
+        # Shade candidate edges from light grey (weak trail) to black (strongest trail), reusing line items
+        for i, (a, b, strength) in enumerate(edges):
+            if i == len(self.pheromone_lines):
+                line = self.canvas.create_line(0, 0, 0, 0, width=road_width)
+                self.canvas.tag_lower(line)  # Under the tour and the cities
+                self.pheromone_lines.append(line)
+            shade = int(255 * (1 - strength) * 0.9)
+            self.canvas.coords(self.pheromone_lines[i], *self.city_coords[a], *self.city_coords[b])
+            self.canvas.itemconfig(self.pheromone_lines[i], fill=f'#{shade:02x}{shade:02x}{shade:02x}', state='normal')
+        for line in self.pheromone_lines[len(edges):self.pheromone_shown]:
+            self.canvas.itemconfig(line, state='hidden')
+        self.pheromone_shown = len(edges)
+
+    def draw_solution(self, solution, distance=None):
+        # Move the single tour polyline to the solution; skipped when a frame shows a tour of the same length
+        if len(solution) < 2 or (distance is not None and distance == self.shown_distance):
+            return
+        self.shown_distance = distance
+        order = np.fromiter(solution, dtype=np.int64, count=len(solution))
+        points = self.city_coords[np.append(order, order[0])].ravel().tolist()
+        if self.tour_line is None:
+            self.tour_line = self.canvas.create_line(*points, fill='red', width=road_width)  # Solid line for the solution path
+            for oval, label in self.city_items:
+                self.canvas.tag_raise(oval)
+                self.canvas.tag_raise(label)
+        else:
+            self.canvas.coords(self.tour_line, *points)
+        if self.city_color != 'blue':
+            for oval, label in self.city_items:
+                self.canvas.itemconfig(oval, fill='blue')
+            self.city_color = 'blue'
 
 if __name__ == '__main__':
     ui = UI()